@@ -1,16 +1,100 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
-import json
+from flask import (Flask, render_template, request, redirect, url_for, flash, jsonify, Response, session, g,
+                   before_render_template, template_rendered)
+import csv
+import functools
+import hashlib
+import io
 import os
-from datetime import datetime
+import queue
+import time
+from datetime import datetime, timezone
 import uuid
 
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from markupsafe import Markup
+from werkzeug.http import is_resource_modified
+
+from src import jsoncodec
+from src.assets import StaticAssets, build_assets
+from src.cache import FragmentCache
+from src.calculator import (DIVISION_BY_ZERO, CalculationError, batch_columns, batch_items, calculate_batch,
+                            calculate_one)
+from src.compression import ResponseCompressor
+from src.contact import JsonLinesMessageStore, MessageQueue, SqliteMessageStore
+from src.expressions import ExpressionCompiler
+from src.metrics import Metrics
+from src.profiling import RequestProfiler
+
+from src.repository import SORT_FIELDS, DuplicateEmailError, UserRepository, user_modified_at
+from src.search import SearchIndex
+from src.stats import AGE_BUCKET, UserStats, compute_stats
+from src.streaming import iter_json_array, iter_ndjson
+from src.storage import (JournalStorage, JsonFileStorage, SqliteStorage, migrate_json_to_sqlite,
+                         write_json_atomic)
+
 app = Flask(__name__)
+# jsonify и request.get_json через orjson, если он установлен
+app.json = jsoncodec.JSONProvider(app)
 app.secret_key = 'your-secret-key-here'  # Для flash сообщений
 
+USERS_FILE = os.environ.get('USERS_FILE', 'users.json')
+# json - весь файл переписывается при каждом изменении,
+# journal - изменения дописываются в журнал users.json.log,
+# sqlite - база users.db (перенос данных: flask --app app migrate-users)
+app.config['USER_STORAGE'] = os.environ.get('USER_STORAGE', 'json')
+app.config['USERS_JOURNAL_COMPACT_EVERY'] = int(os.environ.get('USERS_JOURNAL_COMPACT_EVERY', 1000))
+app.config['USERS_DB'] = os.environ.get('USERS_DB', 'users.db')
+# Размер страницы списка пользователей (HTML и API) и верхняя граница per_page/limit
+app.config['USERS_PER_PAGE'] = 50
+app.config['API_USERS_PER_PAGE'] = 100
+app.config['MAX_PER_PAGE'] = 1000
+# Сколько отрендеренных карточек пользователей и страниц списка держать в памяти
+app.config['USER_CARDS_CACHE_SIZE'] = int(os.environ.get('USER_CARDS_CACHE_SIZE', 10000))
+app.config['USER_PAGES_CACHE_SIZE'] = int(os.environ.get('USER_PAGES_CACHE_SIZE', 100))
+
+# Метрики запросов и внутренних операций на /metrics (формат Prometheus)
+metrics = Metrics()
+
+# Профилирование запросов: PROFILE_REQUESTS=1 - каждого запроса (только для отладки),
+# иначе только запросов с подписанным токеном в ?_profile= или заголовке X-Profile-Token
+# (токен: flask --app app profile-token). Токены подписываются отдельным ключом
+# PROFILE_SECRET, а не secret_key приложения; без него профилирование по токену
+# выключено. Результаты - в каталоге PROFILE_DIR
+app.config['PROFILE_REQUESTS'] = os.environ.get('PROFILE_REQUESTS') == '1'
+app.config['PROFILE_SECRET'] = os.environ.get('PROFILE_SECRET')
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', 'profiles')
+app.config['PROFILE_TOKEN_MAX_AGE'] = int(os.environ.get('PROFILE_TOKEN_MAX_AGE', 3600))
+# Сообщения с формы обратной связи: jsonl - файл CONTACT_MESSAGES_FILE, sqlite - база CONTACT_MESSAGES_DB.
+# Пишутся фоновым потоком пачками до CONTACT_BATCH_SIZE или раз в CONTACT_FLUSH_INTERVAL секунд,
+# в очереди ждут не больше CONTACT_QUEUE_SIZE сообщений
+app.config['CONTACT_STORAGE'] = os.environ.get('CONTACT_STORAGE', 'jsonl')
+app.config['CONTACT_MESSAGES_FILE'] = os.environ.get('CONTACT_MESSAGES_FILE', 'contact_messages.jsonl')
+app.config['CONTACT_MESSAGES_DB'] = os.environ.get('CONTACT_MESSAGES_DB', 'contact_messages.db')
+app.config['CONTACT_QUEUE_SIZE'] = int(os.environ.get('CONTACT_QUEUE_SIZE', 10000))
+app.config['CONTACT_BATCH_SIZE'] = int(os.environ.get('CONTACT_BATCH_SIZE', 100))
+app.config['CONTACT_FLUSH_INTERVAL'] = float(os.environ.get('CONTACT_FLUSH_INTERVAL', 1.0))
+# Статика: имена с хэшем содержимого, заранее сжатые копии и Cache-Control: immutable.
+# Сборка в ASSETS_DIR делается при первом запросе или заранее: flask --app app build-assets
+app.config['ASSETS_FINGERPRINT'] = os.environ.get('ASSETS_FINGERPRINT', '1') == '1'
+app.config['ASSETS_DIR'] = os.environ.get('ASSETS_DIR', os.path.join(app.static_folder, 'dist'))
+static_assets = StaticAssets(app)
+# Сжатие HTML и JSON ответов (gzip, а также br и zstd, если установлены brotli и zstandard).
+# Уровень для каждой кодировки - COMPRESS_LEVELS, ответы меньше COMPRESS_MIN_SIZE байт не сжимаются
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+app.config['COMPRESS_LEVELS'] = {'br': int(os.environ.get('COMPRESS_BR_LEVEL', 5)),
+                                 'zstd': int(os.environ.get('COMPRESS_ZSTD_LEVEL', 3)),
+                                 'gzip': int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))}
+# Наибольший размер пакета для /api/calculate
+app.config['CALCULATE_MAX_BATCH'] = int(os.environ.get('CALCULATE_MAX_BATCH', 10000))
+# Сколько разобранных выражений калькулятора держать в памяти
+app.config['EXPRESSION_CACHE_SIZE'] = int(os.environ.get('EXPRESSION_CACHE_SIZE', 1024))
+# Сколько сжатых тел (ответ с ETag = версия данных + URL) держать в памяти
+app.config['COMPRESS_CACHE_SIZE'] = int(os.environ.get('COMPRESS_CACHE_SIZE', 32))
+
 def load_users():
     try:
-        with open('users.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(USERS_FILE, 'rb') as f:
+            return jsoncodec.load(f)
     except FileNotFoundError:
         initial_users = [
             {"id": 1, "name": "Иван Иванов", "email": "ivan@example.com", "age": 25, "phone": "+7 (999) 123-45-67",
@@ -24,12 +108,96 @@ def load_users():
         return initial_users
 
 
+# Компактно: файл читает программа, а не человек (для людей есть экспорт)
 def save_users(users):
-    with open('users.json', 'w', encoding='utf-8') as f:
-        json.dump(users, f, ensure_ascii=False, indent=2)
+    write_json_atomic(USERS_FILE, users)
+
+
+# lambda нужны, чтобы подмена load_users/save_users подхватывалась на лету
+def create_users_storage():
+    if app.config['USER_STORAGE'] == 'sqlite':
+        storage = SqliteStorage(app.config['USERS_DB'])
+    elif app.config['USER_STORAGE'] == 'journal':
+        storage = JournalStorage(USERS_FILE, compact_every=app.config['USERS_JOURNAL_COMPACT_EVERY'])
+    else:
+        storage = JsonFileStorage(USERS_FILE,
+                                  load=lambda: load_users(),
+                                  save=lambda data: save_users(data))
+    # Время чтения и записи пользователей в /metrics - для любого хранилища
+    storage.load = metrics.timed('load_users')(storage.load)
+    storage.commit = metrics.timed('save_users')(storage.commit)
+    if hasattr(storage, 'changes_since'):
+        storage.changes_since = metrics.timed('load_users')(storage.changes_since)
+    return storage
+
+
+# Пользователи хранятся в памяти, файл перечитывается только при изменении
+users_repo = UserRepository(create_users_storage())
+
+# Поисковый индекс обновляется вместе с репозиторием при каждом изменении
+search_index = SearchIndex()
+users_repo.subscribe(search_index)
+fragment_cache = FragmentCache(app.config['USER_CARDS_CACHE_SIZE'], app.config['USER_PAGES_CACHE_SIZE'])
+users_repo.subscribe(fragment_cache)
+user_stats = UserStats()
+users_repo.subscribe(user_stats)
+expression_compiler = ExpressionCompiler(app.config['EXPRESSION_CACHE_SIZE'])
+
+
+def create_contact_store():
+    if app.config['CONTACT_STORAGE'] == 'sqlite':
+        return SqliteMessageStore(app.config['CONTACT_MESSAGES_DB'])
+    return JsonLinesMessageStore(app.config['CONTACT_MESSAGES_FILE'])
+
+
+contact_queue = MessageQueue(create_contact_store,
+                             maxsize=app.config['CONTACT_QUEUE_SIZE'],
+                             batch_size=app.config['CONTACT_BATCH_SIZE'],
+                             flush_interval=app.config['CONTACT_FLUSH_INTERVAL'])
+
+
+# Перенос users.json в SQLite: flask --app app migrate-users
+@app.cli.command('migrate-users')
+def migrate_users_command():
+    count = migrate_json_to_sqlite(USERS_FILE, app.config['USERS_DB'])
+    print(f"Перенесено пользователей: {count} ({USERS_FILE} -> {app.config['USERS_DB']})")
+
 
+def profile_token_serializer():
+    return URLSafeTimedSerializer(app.config['PROFILE_SECRET'], salt='request-profile')
 
-users = load_users()
+
+def should_profile(req):
+    if app.config['PROFILE_REQUESTS']:
+        return True
+    token = req.args.get('_profile') or req.headers.get('X-Profile-Token')
+    if not token or not app.config['PROFILE_SECRET']:
+        return False
+    try:
+        profile_token_serializer().loads(token, max_age=app.config['PROFILE_TOKEN_MAX_AGE'])
+    except BadSignature:
+        return False
+    return True
+
+
+app.wsgi_app = RequestProfiler(app.wsgi_app, should_profile, lambda: app.config['PROFILE_DIR'])
+
+
+# Сборка статики при деплое, чтобы первый запрос не ждал: flask --app app build-assets
+@app.cli.command('build-assets')
+def build_assets_command():
+    manifest = build_assets(app.static_folder, app.config['ASSETS_DIR'])
+    static_assets.reset()
+    print(f"Собрано файлов: {len(manifest)} ({app.static_folder} -> {app.config['ASSETS_DIR']})")
+
+
+# Токен для профилирования отдельных запросов: flask --app app profile-token
+@app.cli.command('profile-token')
+def profile_token_command():
+    if not app.config['PROFILE_SECRET']:
+        raise SystemExit('Профилирование по токену выключено: задайте переменную окружения PROFILE_SECRET')
+    print(profile_token_serializer().dumps('profile'))
+    print(f"Действует {app.config['PROFILE_TOKEN_MAX_AGE']} секунд: ?_profile=<токен> или заголовок X-Profile-Token")
 
 
 # Главная страница
@@ -54,21 +222,240 @@ def contact():
         email = request.form.get('email')
         message = request.form.get('message')
 
-        # Здесь можно сохранить сообщение в БД
+        # Запись в хранилище - в фоновом потоке, здесь только очередь в памяти
+        try:
+            contact_queue.put({"id": uuid.uuid4().hex, "name": name, "email": email, "message": message,
+                               "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
+        except queue.Full:
+            flash('Сейчас слишком много сообщений, попробуйте отправить еще раз позже.', 'error')
+            return redirect(url_for('contact'))
         flash(f'Спасибо, {name}! Ваше сообщение отправлено.', 'success')
         return redirect(url_for('contact'))
 
     return render_template('contact.html', title="Контакты")
 
 
+# Параметры пагинации, сортировки и фильтров из query string:
+# page/per_page или курсор after_id/limit, sort, order=asc|desc, city, min_age, max_age,
+# q - поисковый запрос по имени, email, городу и телефону
+USER_QUERY_ARGS = ('page', 'per_page', 'after_id', 'limit', 'sort', 'order', 'city', 'min_age', 'max_age',
+                   'q')
+
+
+def parse_user_query(args, default_per_page):
+    query = {'sort': args.get('sort', 'id')}
+    if query['sort'] not in SORT_FIELDS:
+        raise ValueError(f"Unknown sort field: {query['sort']}")
+
+    order = args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        raise ValueError(f'Unknown order: {order}')
+    query['descending'] = order == 'desc'
+
+    for field in ('q', 'city'):
+        value = args.get(field, '').strip()
+        if value:
+            query[field] = value
+    for field in ('min_age', 'max_age'):
+        if args.get(field, '').strip():
+            query[field] = int(args[field])
+
+    per_page = int(args.get('limit') or args.get('per_page') or default_per_page)
+    if per_page < 1 or per_page > app.config['MAX_PER_PAGE']:
+        raise ValueError(f"per_page must be between 1 and {app.config['MAX_PER_PAGE']}")
+    page = int(args.get('page', 1))
+    if page < 1:
+        raise ValueError('page must be positive')
+
+    query['limit'] = per_page
+    if args.get('after_id'):
+        query['after_id'] = int(args['after_id'])
+    else:
+        query['offset'] = (page - 1) * per_page
+    return query, page
+
+
+def query_users(query):
+    query = dict(query)
+    search = query.pop('q', None)
+    if search:
+        users_repo.refresh()
+        query['ids'] = search_index.search(search)
+    try:
+        return users_repo.query(**query)
+    except KeyError:
+        raise ValueError('Unknown after_id cursor')
+
+
+# Замер каждого запроса: количество по статусам и длительность по endpoint
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Для несуществующих URL один общий endpoint, чтобы не плодить метрики
+        metrics.observe_request(request.endpoint or 'unmatched', request.method, response.status_code,
+                                time.perf_counter() - started)
+    return response
+
+
+# after_request выполняются в обратном порядке: сжатие раньше записи метрик,
+# поэтому его время входит во время запроса
+compressor = ResponseCompressor(app)
+
+
+def start_render_timer(sender, template, context, **extra):
+    g.render_started = time.perf_counter()
+
+
+def record_render_time(sender, template, context, **extra):
+    started = g.pop('render_started', None)
+    if started is not None:
+        metrics.observe(f'render_template:{template.name}', time.perf_counter() - started)
+
+
+before_render_template.connect(start_render_timer, app)
+template_rendered.connect(record_render_time, app)
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# Условные GET запросы: ETag и Last-Modified считаются по версии данных
+# до выборки и рендеринга, поэтому на If-None-Match / If-Modified-Since
+# с актуальной версией отвечаем 304 без запроса к хранилищу и шаблонам.
+# validators(**view_args) возвращает (версия, время изменения) или None,
+# если проверять нечего (например, пользователя нет - пусть ответит сам view)
+def conditional(validators):
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**view_args):
+            # Непоказанные flash сообщения попадут в страницу - ее нельзя подменять 304
+            if session.get('_flashes'):
+                return view(**view_args)
+            result = validators(**view_args)
+            if result is None:
+                return view(**view_args)
+            version, last_modified = result
+            # Один URL отдает разные представления (JSON, NDJSON), у каждого свой ETag
+            representation = request.accept_mimetypes.best_match(['text/html', 'application/json',
+                                                                  'application/x-ndjson'])
+            etag = hashlib.sha1(f'{version}|{request.full_path}|{representation}'.encode()).hexdigest()[:32]
+            if last_modified is not None:
+                last_modified = datetime.fromtimestamp(int(last_modified), timezone.utc)
+
+            # Клиент мог сохранить ETag сжатого представления ("...-gzip")
+            matched = next((candidate for candidate in compressor.etag_variants(etag)
+                            if not is_resource_modified(request.environ, etag=candidate,
+                                                        last_modified=last_modified)), None)
+            if matched is not None:
+                response = Response(status=304)
+                etag = matched
+            else:
+                response = app.make_response(view(**view_args))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Кэшировать можно, но перед использованием спросить сервер
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+
+def list_validators(**view_args):
+    return users_repo.version, users_repo.last_modified
+
+
+def user_validators(user_id):
+    version = users_repo.user_version(user_id)
+    if version is None:
+        return None
+    return version, user_modified_at(users_repo.get(user_id))
+
+
+# HTML карточек пользователей: из кэша, рендерится только то, чего там нет
+# (новые и измененные после последнего рендеринга пользователи)
+def render_user_cards(users):
+    template = app.jinja_env.get_template('_user_card.html')
+    with metrics.timer('render_user_cards'):
+        return [fragment_cache.card(user['id'], users_repo.user_version(user['id']),
+                                    lambda user=user: Markup(template.render(user=user)))
+                for user in users]
+
+
 # Страница со списком пользователей
 @app.route('/users')
+@conditional(list_validators)
 def users_list():
-    users = load_users()
-    return render_template('users.html',
+    # Готовая страница для этой версии данных и этого URL. Если есть
+    # непоказанные flash сообщения, страница будет другой - рендерим заново
+    page_key = (users_repo.version, request.full_path)
+    cacheable = not session.get('_flashes')
+    if cacheable:
+        html = fragment_cache.pages.get(page_key)
+        if html is not None:
+            return html
+
+    try:
+        query, page = parse_user_query(request.args, app.config['USERS_PER_PAGE'])
+        users, found = query_users(query)
+    except ValueError as e:
+        flash(f'Некорректные параметры списка: {e}', 'error')
+        cacheable = False
+        query, page = parse_user_query({}, app.config['USERS_PER_PAGE'])
+        users, found = query_users(query)
+
+    args = {key: value for key, value in request.args.items() if key in USER_QUERY_ARGS}
+    args.pop('after_id', None)
+    pages = max((found + query['limit'] - 1) // query['limit'], 1)
+    prev_url = url_for('users_list', **dict(args, page=page - 1)) if page > 1 else None
+    next_url = url_for('users_list', **dict(args, page=page + 1)) if page < pages else None
+
+    html = render_template('users.html',
                            title="Пользователи",
                            users=users,
-                           total_users=len(users))
+                           cards=render_user_cards(users),
+                           total_users=users_repo.count(),
+                           found_users=found,
+                           page=page,
+                           pages=pages,
+                           per_page=query['limit'],
+                           prev_url=prev_url,
+                           next_url=next_url,
+                           sort_fields=SORT_FIELDS,
+                           filters=args)
+    if cacheable:
+        fragment_cache.pages.set(page_key, html)
+    return html
+
+
+# Общие правила проверки полей пользователя (формы и импорт)
+def validate_user_fields(name, email, age):
+    errors = []
+
+    if not name:
+        errors.append('Имя обязательно для заполнения')
+    if not email:
+        errors.append('Email обязателен для заполнения')
+    elif '@' not in email:
+        errors.append('Некорректный email адрес')
+
+    # isdecimal, а не isdigit: "²" - цифра, но int() ее не разберет
+    if not age.isdecimal():
+        errors.append('Возраст должен быть числом')
+    elif int(age) < 0 or int(age) > 150:
+        errors.append('Некорректный возраст')
+
+    return errors
 
 
 # Форма добавления пользователя
@@ -83,23 +470,10 @@ def add_user():
         city = request.form.get('city', '').strip()
 
         # Валидация
-        errors = []
-
-        if not name:
-            errors.append('Имя обязательно для заполнения')
-        if not email:
-            errors.append('Email обязателен для заполнения')
-        elif '@' not in email:
-            errors.append('Некорректный email адрес')
-
-        if not age.isdigit():
-            errors.append('Возраст должен быть числом')
-        elif int(age) < 0 or int(age) > 150:
-            errors.append('Некорректный возраст')
+        errors = validate_user_fields(name, email, age)
 
         # Проверка на уникальность email
-        users = load_users()
-        if any(user['email'].lower() == email.lower() for user in users):
+        if users_repo.email_taken(email):
             errors.append('Пользователь с таким email уже существует')
 
         if errors:
@@ -109,10 +483,8 @@ def add_user():
                                    title="Добавить пользователя",
                                    form_data=request.form)
 
-        # Создаем нового пользователя
-        new_id = max(user['id'] for user in users) + 1 if users else 1
+        # Создаем нового пользователя (id выдает репозиторий)
         new_user = {
-            "id": new_id,
             "name": name,
             "email": email,
             "age": int(age),
@@ -121,8 +493,13 @@ def add_user():
             "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
 
-        users.append(new_user)
-        save_users(users)
+        try:
+            users_repo.add(new_user)
+        except DuplicateEmailError:
+            flash('Пользователь с таким email уже существует', 'error')
+            return render_template('add_user.html',
+                                   title="Добавить пользователя",
+                                   form_data=request.form)
 
         flash(f'Пользователь {name} успешно добавлен!', 'success')
         return redirect(url_for('users_list'))
@@ -133,8 +510,7 @@ def add_user():
 # Редактирование пользователя
 @app.route('/users/edit/<int:user_id>', methods=['GET', 'POST'])
 def edit_user(user_id):
-    users = load_users()
-    user = next((u for u in users if u['id'] == user_id), None)
+    user = users_repo.get(user_id)
 
     if not user:
         flash('Пользователь не найден', 'error')
@@ -148,22 +524,10 @@ def edit_user(user_id):
         city = request.form.get('city', '').strip()
 
         # Валидация
-        errors = []
-
-        if not name:
-            errors.append('Имя обязательно для заполнения')
-        if not email:
-            errors.append('Email обязателен для заполнения')
-        elif '@' not in email:
-            errors.append('Некорректный email адрес')
-
-        if not age.isdigit():
-            errors.append('Возраст должен быть числом')
-        elif int(age) < 0 or int(age) > 150:
-            errors.append('Некорректный возраст')
+        errors = validate_user_fields(name, email, age)
 
         # Проверка на уникальность email (исключая текущего пользователя)
-        if any(u['email'].lower() == email.lower() and u['id'] != user_id for u in users):
+        if users_repo.email_taken(email, exclude_id=user_id):
             errors.append('Пользователь с таким email уже существует')
 
         if errors:
@@ -174,14 +538,19 @@ def edit_user(user_id):
                                    user=user)
 
         # Обновляем данные пользователя
-        user['name'] = name
-        user['email'] = email
-        user['age'] = int(age)
-        user['phone'] = phone
-        user['city'] = city
-        user['updated_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        save_users(users)
+        try:
+            users_repo.update(user_id, {
+                "name": name,
+                "email": email,
+                "age": int(age),
+                "phone": phone,
+                "city": city
+            })
+        except DuplicateEmailError:
+            flash('Пользователь с таким email уже существует', 'error')
+            return render_template('edit_user.html',
+                                   title="Редактировать пользователя",
+                                   user=user)
         flash(f'Данные пользователя {name} успешно обновлены!', 'success')
         return redirect(url_for('users_list'))
 
@@ -193,12 +562,9 @@ def edit_user(user_id):
 # Удаление пользователя
 @app.route('/users/delete/<int:user_id>', methods=['POST'])
 def delete_user(user_id):
-    users = load_users()
-    user = next((u for u in users if u['id'] == user_id), None)
+    user = users_repo.delete(user_id)
 
     if user:
-        users = [u for u in users if u['id'] != user_id]
-        save_users(users)
         flash(f'Пользователь {user["name"]} успешно удален', 'success')
     else:
         flash('Пользователь не найден', 'error')
@@ -208,9 +574,9 @@ def delete_user(user_id):
 
 # Динамическая страница пользователя
 @app.route('/user/<int:user_id>')
+@conditional(user_validators)
 def user_profile(user_id):
-    users = load_users()
-    user = next((u for u in users if u['id'] == user_id), None)
+    user = users_repo.get(user_id)
     if user:
         return render_template('user_profile.html',
                                title=f"Профиль: {user['name']}",
@@ -220,16 +586,93 @@ def user_profile(user_id):
 
 # API endpoint для получения данных о пользователях
 @app.route('/api/users')
+@conditional(list_validators)
 def api_users():
-    users = load_users()
+    # Без параметров - весь список, как раньше
+    if not any(key in request.args for key in USER_QUERY_ARGS):
+        return users_response(users_repo.all())
+
+    try:
+        query, page = parse_user_query(request.args, app.config['API_USERS_PER_PAGE'])
+        users, total = query_users(query)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    response = users_response(users)
+    response.headers['X-Total-Count'] = str(total)
+    # Ссылка на следующую страницу (курсором, если клиент пришел с курсором)
+    args = request.args.to_dict()
+    if 'after_id' in query:
+        if users and len(users) == query['limit']:
+            args['after_id'] = users[-1]['id']
+            response.headers['Link'] = f'<{url_for("api_users", _external=True, **args)}>; rel="next"'
+    elif query['offset'] + len(users) < total:
+        args['page'] = page + 1
+        response.headers['Link'] = f'<{url_for("api_users", _external=True, **args)}>; rel="next"'
+    return response
+
+
+# Потоковая выдача: NDJSON по заголовку Accept: application/x-ndjson,
+# JSON массив по частям при ?stream=1. Иначе обычный jsonify
+def users_response(users):
+    best = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+    if best == 'application/x-ndjson':
+        return Response(iter_ndjson(users), mimetype='application/x-ndjson')
+    if request.args.get('stream') in ('1', 'true'):
+        return Response(iter_json_array(users), mimetype='application/json')
     return jsonify(users)
 
 
+# Поиск пользователей по началу слов: /api/users/search?q=иван моск
+# (поддерживает те же параметры сортировки, фильтров и пагинации, что и /api/users)
+@app.route('/api/users/search')
+def api_users_search():
+    if not request.args.get('q', '').strip():
+        return jsonify({"error": "Missing query parameter: q"}), 400
+
+    try:
+        query, page = parse_user_query(request.args, app.config['API_USERS_PER_PAGE'])
+        users, total = query_users(query)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    response = users_response(users)
+    response.headers['X-Total-Count'] = str(total)
+    return response
+
+
+# Статистика: пользователи по городам, гистограмма возрастов, регистрации по дням.
+# ?bucket=5 - ширина корзины возрастов, ?recompute=1 - пересчитать по всем
+# пользователям, а не брать инкрементальные счетчики
+@app.route('/api/users/stats')
+@conditional(list_validators)
+def api_users_stats():
+    try:
+        age_bucket = int(request.args.get('bucket', AGE_BUCKET))
+        if age_bucket < 1:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "bucket must be a positive integer"}), 400
+
+    users_repo.refresh()
+    if request.args.get('recompute') in ('1', 'true'):
+        return jsonify(compute_stats(users_repo.all(), age_bucket))
+    return jsonify(user_stats.snapshot(age_bucket))
+
+
+# Выгрузка всех пользователей файлом (кнопка "Экспорт JSON")
+@app.route('/api/users/export')
+def api_users_export():
+    response = Response(iter_json_array(users_repo.all(), indent=2), mimetype='application/json')
+    response.headers['Content-Disposition'] = 'attachment; filename=users_export.json'
+    return response
+
+
 # API endpoint для получения одного пользователя
 @app.route('/api/users/<int:user_id>')
+@conditional(user_validators)
 def api_user(user_id):
-    users = load_users()
-    user = next((u for u in users if u['id'] == user_id), None)
+    user = users_repo.get(user_id)
     if user:
         return jsonify(user)
     return jsonify({"error": "User not found"}), 404
@@ -244,32 +687,41 @@ def api_add_user():
         if not data:
             return jsonify({"error": "No data provided"}), 400
 
-        users = load_users()
-
         # Валидация
         required_fields = ['name', 'email', 'age']
         for field in required_fields:
             if field not in data:
                 return jsonify({"error": f"Missing field: {field}"}), 400
 
+        # Типы полей: строка вместо числа (или наоборот) сломала бы индексы и сортировку
+        for field in ('name', 'email', 'phone', 'city'):
+            if (field in required_fields or data.get(field) is not None) and not isinstance(data.get(field), str):
+                return jsonify({"error": f"Field {field} must be a string"}), 400
+        age = data['age']
+        if isinstance(age, str) and age.strip().isdecimal():
+            age = int(age)
+        # null тоже не возраст: поле обязательное
+        if isinstance(age, bool) or not isinstance(age, int):
+            return jsonify({"error": "Field age must be an integer"}), 400
+
         # Проверка email
-        if any(user['email'].lower() == data['email'].lower() for user in users):
+        if users_repo.email_taken(data['email']):
             return jsonify({"error": "User with this email already exists"}), 400
 
-        # Создаем нового пользователя
-        new_id = max(user['id'] for user in users) + 1 if users else 1
+        # Создаем нового пользователя (id выдает репозиторий)
         new_user = {
-            "id": new_id,
             "name": data['name'],
             "email": data['email'],
-            "age": int(data['age']),
-            "phone": data.get('phone', ''),
-            "city": data.get('city', ''),
+            "age": age,
+            "phone": data.get('phone') or '',
+            "city": data.get('city') or '',
             "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
 
-        users.append(new_user)
-        save_users(users)
+        try:
+            new_user = users_repo.add(new_user)
+        except DuplicateEmailError:
+            return jsonify({"error": "User with this email already exists"}), 400
 
         return jsonify({
             "success": True,
@@ -281,37 +733,145 @@ def api_add_user():
         return jsonify({"error": str(e)}), 500
 
 
-# Простой калькулятор (API endpoint)
+# Разбор тела запроса на импорт: JSON массив, NDJSON или CSV
+# (телом запроса или файлом из формы в поле file)
+def parse_import_records():
+    upload = request.files.get('file')
+    if upload is not None:
+        body = upload.read()
+        filename = (upload.filename or '').lower()
+        if filename.endswith('.csv'):
+            kind = 'csv'
+        elif filename.endswith(('.ndjson', '.jsonl')):
+            kind = 'ndjson'
+        else:
+            kind = 'json'
+    else:
+        body = request.get_data()
+        kind = {'text/csv': 'csv',
+                'application/x-ndjson': 'ndjson'}.get(request.mimetype, 'json')
+
+    text = body.decode('utf-8-sig')
+    if kind == 'csv':
+        # Excel в русской локали сохраняет CSV через точку с запятой
+        try:
+            dialect = csv.Sniffer().sniff(text.split('\n', 1)[0], delimiters=',;')
+        except csv.Error:
+            # В файле из одной колонки разделителя нет
+            dialect = csv.excel
+        return list(csv.DictReader(io.StringIO(text), dialect=dialect))
+    if kind == 'ndjson':
+        return [jsoncodec.loads(line) for line in text.splitlines() if line.strip()]
+    records = jsoncodec.loads(text)
+    if not isinstance(records, list):
+        raise ValueError('Expected a JSON array of users')
+    return records
+
+
+# API endpoint для массового импорта пользователей.
+# Все записи проверяются по тем же правилам, что и форма добавления,
+# email должен быть уникален и внутри пакета, и среди существующих.
+# Корректные записи сохраняются одной записью в хранилище
+@app.route('/api/users/import', methods=['POST'])
+def api_import_users():
+    try:
+        records = parse_import_records()
+    except (ValueError, csv.Error) as e:
+        return jsonify({"error": f"Cannot parse import data: {e}"}), 400
+
+    errors = []
+    valid = []
+    valid_rows = []
+    seen_emails = set()
+    for row, record in enumerate(records, start=1):
+        if not isinstance(record, dict):
+            errors.append({"row": row, "errors": ['Запись должна быть объектом']})
+            continue
+        # Как и в api_add_user: массивы, объекты, true/false не превращаются в строки
+        wrong_types = [key for key in ('name', 'email', 'age', 'phone', 'city')
+                       if record.get(key) is not None
+                       and (isinstance(record[key], bool) or not isinstance(record[key], (str, int)))]
+        if wrong_types:
+            errors.append({"row": row, "errors": [f'Поле {key} должно быть строкой или числом'
+                                                  for key in wrong_types]})
+            continue
+        # 0 и другие "ложные" значения - тоже значения, пусто только при None
+        fields = {key: '' if record.get(key) is None else str(record.get(key)).strip()
+                  for key in ('name', 'email', 'age', 'phone', 'city')}
+        row_errors = validate_user_fields(fields['name'], fields['email'], fields['age'])
+
+        email_key = fields['email'].casefold()
+        if email_key in seen_emails:
+            row_errors.append('Email повторяется в импортируемых данных')
+        elif fields['email'] and users_repo.email_taken(fields['email']):
+            row_errors.append('Пользователь с таким email уже существует')
+        seen_emails.add(email_key)
+
+        if row_errors:
+            errors.append({"row": row, "errors": row_errors})
+            continue
+        fields['age'] = int(fields['age'])
+        valid.append(fields)
+        valid_rows.append(row)
+
+    created, duplicates = users_repo.add_many(valid)
+    # Email мог занять параллельный запрос уже после проверки
+    for position in duplicates:
+        errors.append({"row": valid_rows[position], "errors": ['Пользователь с таким email уже существует']})
+    errors.sort(key=lambda error: error['row'])
+
+    status = 201 if created else (400 if errors else 200)
+    return jsonify({
+        "success": bool(created) and not errors,
+        "total": len(records),
+        "created": len(created),
+        "failed": len(errors),
+        "ids": [user['id'] for user in created],
+        "errors": errors
+    }), status
+
+
+# Простой калькулятор (API endpoint). Кроме одной операции {"a", "b", "operation"}
+# принимает пакет: массивы {"a": [...], "b": [...], "operation": [...] или строка}
+# или массив объектов [{"a", "b", "operation"}, ...]; ответ - {"results": [...]}.
+# Выражения: {"expression": "(a + b) ^ 2 % 7 + sqrt(c)", "variables": {"a": 1, ...}},
+# "variables" может быть массивом - тогда одна формула считается для каждого набора;
+# в массиве объектов можно смешивать выражения и операции
 @app.route('/api/calculate', methods=['POST'])
 def calculate():
     data = request.get_json()
-    a = float(data.get('a', 0))
-    b = float(data.get('b', 0))
-    operation = data.get('operation', 'add')
-
-    result = 0
-    if operation == 'add':
-        result = a + b
-    elif operation == 'subtract':
-        result = a - b
-    elif operation == 'multiply':
-        result = a * b
-    elif operation == 'divide':
-        if b != 0:
-            result = a / b
-        else:
-            return jsonify({"error": "Division by zero"}), 400
+    max_batch = app.config['CALCULATE_MAX_BATCH']
 
-    return jsonify({"result": result})
+    try:
+        if isinstance(data, list):
+            if any(isinstance(item, dict) and 'expression' in item for item in data):
+                return jsonify({"results": expression_compiler.evaluate_items(data, max_batch)})
+            columns = batch_items(data, max_batch)
+        elif isinstance(data, dict) and 'expression' in data:
+            variables = data.get('variables')
+            if isinstance(variables, list):
+                items = [{"expression": data['expression'], "variables": item} for item in variables]
+                return jsonify({"results": expression_compiler.evaluate_items(items, max_batch)})
+            return jsonify({"result": expression_compiler.compile(data['expression']).evaluate(variables)})
+        elif isinstance(data, dict) and any(isinstance(data.get(key), list) for key in ('a', 'b', 'operation')):
+            columns = batch_columns(data, max_batch)
+        else:
+            data = data or {}
+            result = calculate_one(data.get('a', 0), data.get('b', 0), data.get('operation', 'add'))
+            return jsonify({"result": result})
+        return jsonify({"results": calculate_batch(*columns)})
+    except ZeroDivisionError:
+        return jsonify({"error": DIVISION_BY_ZERO}), 400
+    except CalculationError as e:
+        return jsonify({"error": str(e)}), 400
 
 
 # Страница с информацией о сервере
 @app.route('/info')
 def server_info():
-    users = load_users()
     info = {
         "Время на сервере": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "Всего пользователей": len(users),
+        "Всего пользователей": users_repo.count(),
         "Метод запроса": request.method,
         "User-Agent": request.headers.get('User-Agent')
     }
@@ -326,8 +886,7 @@ def page_not_found(e):
 
 
 if __name__ == '__main__':
-    if not os.path.exists('users.json'):
-        with open('users.json', 'w', encoding='utf-8') as f:
-            json.dump([], f, ensure_ascii=False, indent=2)
+    if not os.path.exists(USERS_FILE):
+        save_users([])
 
     app.run(debug=True, port=5000)
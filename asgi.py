@@ -0,0 +1,9 @@
+# ASGI точка входа, например: uvicorn asgi:application --port 5000
+# Обработчики выполняются в пуле из ASGI_THREADS потоков, соединения
+# с медленными клиентами держит event loop
+import os
+
+from app import app
+from src.asgi import AsgiAdapter
+
+application = AsgiAdapter(app, max_workers=int(os.environ.get('ASGI_THREADS', 32)))
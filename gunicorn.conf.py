@@ -0,0 +1,48 @@
+# Настройки gunicorn (подхватываются автоматически: gunicorn wsgi:application).
+# Любой параметр можно переопределить переменной окружения или флагом командной строки.
+#
+# Обработчики в основном ждут диск (users.json, журнал, SQLite), а не процессор,
+# поэтому по умолчанию воркеры с потоками (gthread): процессов по числу ядер,
+# в каждом несколько потоков. Данные пользователей держатся в памяти каждого
+# процесса, так что больше процессов - больше памяти, а потоки почти бесплатны.
+#
+# Плавный перезапуск без потери запросов: kill -HUP <pid master процесса>
+# (новые воркеры стартуют, старые дорабатывают текущие запросы за graceful_timeout)
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Перезапуск при изменении кода - только для разработки
+reload = os.environ.get('GUNICORN_RELOAD', '0') == '1'
+
+# Загрузить приложение в master до fork: воркеры стартуют быстрее и делят
+# память с master (copy-on-write). При HUP код при этом не перечитывается -
+# для обновления кода нужен полный перезапуск или GUNICORN_PRELOAD=0.
+# С reload не совместимо
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1' and not reload
+
+# Keep-alive за reverse proxy: соединение держится несколько секунд
+# между запросами и не занимает поток, пока клиент молчит (gthread)
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# Периодический перезапуск воркеров (0 - выключено); jitter, чтобы они
+# не перезапускались одновременно
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.environ.get('GUNICORN_ERROR_LOG', '-')
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    # Данные, загруженные в master до fork, могли устареть - проверяем хранилище
+    from app import users_repo
+    users_repo.refresh()
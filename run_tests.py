@@ -69,6 +69,18 @@ def run_tests(test_type, pattern=None):
         return False
 
 
+# Нагрузочные замеры (tests/benchmark), остальные аргументы передаются как есть:
+# python run_tests.py --type bench --sizes 1000,10000 --save-baseline
+def run_benchmarks(bench_args):
+    print(f"\n{'=' * 60}")
+    print("Нагрузочные замеры")
+    print('=' * 60)
+
+    bench_script = Path(__file__).parent / 'tests' / 'benchmark' / 'bench_users.py'
+    result = subprocess.run([sys.executable, str(bench_script)] + bench_args, check=False)
+    return result.returncode == 0
+
+
 def run_simple_tests():
     print(f"\n{'=' * 60}")
     print("Запуск упрощенных тестов")
@@ -117,12 +129,15 @@ def main():
 
     # Парсим аргументы
     parser = argparse.ArgumentParser(description='Запуск тестов Flask приложения')
-    parser.add_argument('--type', choices=['unit', 'integration', 'system', 'all', 'simple'],
+    parser.add_argument('--type', choices=['unit', 'integration', 'system', 'all', 'simple', 'bench'],
                         default='simple', help='Тип тестов для запуска')
     parser.add_argument('--pattern', help='Шаблон для поиска тестовых файлов')
     parser.add_argument('--list', action='store_true', help='Показать доступные тесты')
 
-    args = parser.parse_args()
+    # Неизвестные аргументы допустимы только для bench - они уходят в tests/benchmark/bench_users.py
+    args, extra_args = parser.parse_known_args()
+    if extra_args and args.type != 'bench':
+        parser.error(f"unrecognized arguments: {' '.join(extra_args)}")
 
     if args.list:
         show_available_tests()
@@ -131,6 +146,8 @@ def main():
     # Запускаем указанный тип тестов
     if args.type == 'all':
         success = run_all_tests()
+    elif args.type == 'bench':
+        success = run_benchmarks(extra_args)
     elif args.type == 'simple':
         results = run_simple_tests()
         success = all(s for _, s in results)
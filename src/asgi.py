@@ -0,0 +1,134 @@
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Тело запроса больше этого размера сбрасывается из памяти во временный файл
+SPOOL_SIZE = 1024 * 1024
+
+_END = object()
+
+
+# ASGI адаптер для WSGI приложения (Flask). Медленные клиенты обслуживаются
+# в event loop: тело запроса читается и ответ отправляется асинхронно,
+# а в пул потоков уходит только сам обработчик (работа с хранилищем,
+# шаблоны) и получение следующего куска потокового ответа.
+# Поток занят только пока обработчик реально работает, а не все время соединения
+class AsgiAdapter:
+    def __init__(self, wsgi_app, max_workers=None):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        body = await self._read_body(receive)
+        if body is None:
+            # Клиент отключился, не дослав запрос
+            return
+
+        loop = asyncio.get_running_loop()
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response.get('started'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+            return lambda data: response.setdefault('written', []).append(data)
+
+        try:
+            iterable = await loop.run_in_executor(self.executor, self.wsgi_app,
+                                                  self._environ(scope, body), start_response)
+        except BaseException:
+            body.close()
+            raise
+        try:
+            iterator = iter(iterable)
+            # start_response может быть вызван только при получении первого куска
+            chunk = await loop.run_in_executor(self.executor, next, iterator, _END)
+            response['started'] = True
+            await send({'type': 'http.response.start',
+                        'status': response['status'],
+                        'headers': response['headers']})
+            for data in response.get('written', ()):
+                await send({'type': 'http.response.body', 'body': data, 'more_body': True})
+            while chunk is not _END:
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await loop.run_in_executor(self.executor, next, iterator, _END)
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            close = getattr(iterable, 'close', None)
+            if close is not None:
+                await loop.run_in_executor(self.executor, close)
+            body.close()
+
+    @staticmethod
+    async def _read_body(receive):
+        body = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+        body.seek(0)
+        return body
+
+    @staticmethod
+    def _environ(scope, body):
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', ()):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = 'HTTP_' + name
+            if name in environ:
+                # Cookie от HTTP/2 клиентов приходит несколькими заголовками,
+                # а в одном заголовке пары разделяются "; ", не запятой
+                value = environ[name] + ('; ' if name == 'HTTP_COOKIE' else ',') + value
+            environ[name] = value
+        # Тело уже прочитано целиком (в том числе chunked) - длина известна
+        body.seek(0, 2)
+        environ['CONTENT_LENGTH'] = str(body.tell())
+        body.seek(0)
+        return environ
@@ -0,0 +1,187 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import tempfile
+import threading
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:
+    # Без brotli остается только gzip
+    brotli = None
+
+MANIFEST = 'manifest.json'
+# Что имеет смысл сжимать заранее (woff2, картинки уже сжаты)
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.ttf', '.html', '.map')
+# Год: имя файла меняется вместе с содержимым, поэтому кэшировать можно навсегда
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_CSS_URL_RE = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+
+def _fingerprinted(name, content):
+    stem, ext = posixpath.splitext(name)
+    return f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+
+
+def _write_atomic(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.asset.')
+    try:
+        with open(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _sources(static_dir, output_dir):
+    output_dir = os.path.abspath(output_dir)
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = [d for d in dirs if os.path.abspath(os.path.join(root, d)) != output_dir]
+        for name in files:
+            if not name.startswith('.'):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, static_dir).replace(os.sep, '/'), path
+
+
+# Ссылки url(...) внутри CSS переписываются на имена с хэшем,
+# иначе шрифты и картинки из CSS не получили бы долгого кэширования
+def _rewrite_css(name, content, manifest):
+    base = posixpath.dirname(name)
+
+    def replace(match):
+        quote, ref = match.groups()
+        if ref.startswith(('data:', 'http:', 'https:', '//', '#', '/')):
+            return match.group(0)
+        path, suffix = re.match(r'([^?#]*)(.*)', ref).groups()
+        target = manifest.get(posixpath.normpath(posixpath.join(base, path)))
+        if target is None:
+            return match.group(0)
+        return f'url({quote}{posixpath.relpath(target, base or ".")}{suffix}{quote})'
+
+    return _CSS_URL_RE.sub(replace, content.decode('utf-8')).encode('utf-8')
+
+
+# Сборка: каждый файл из static_dir копируется в output_dir с хэшем
+# содержимого в имени, рядом кладутся .gz и .br. manifest.json:
+# исходное имя -> имя с хэшем (пути относительно каталогов)
+def build_assets(static_dir, output_dir):
+    manifest = {}
+    # CSS последними: к этому моменту известны хэши шрифтов и картинок
+    sources = sorted(_sources(static_dir, output_dir), key=lambda item: (item[0].endswith('.css'), item[0]))
+    for name, path in sources:
+        with open(path, 'rb') as f:
+            content = f.read()
+        if name.endswith('.css'):
+            content = _rewrite_css(name, content, manifest)
+        hashed = _fingerprinted(name, content)
+        manifest[name] = hashed
+
+        target = os.path.join(output_dir, *hashed.split('/'))
+        if os.path.exists(target):
+            continue
+        if name.endswith(COMPRESSIBLE):
+            # mtime=0: одинаковое содержимое - одинаковый .gz
+            _write_atomic(target + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write_atomic(target + '.br', brotli.compress(content, quality=11))
+        _write_atomic(target, content)
+
+    _write_atomic(os.path.join(output_dir, MANIFEST),
+                  json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+# Подключение к Flask: url_for('static', filename='css/style.css') дает
+# /static/css/style.<хэш>.css, такие файлы отдаются из каталога сборки
+# с Cache-Control: immutable и в сжатом виде, если клиент это принимает.
+# Если сборки нет или исходники новее, она делается при первом обращении.
+# В режиме отладки хэши не подставляются (файлы меняются постоянно)
+class StaticAssets:
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        # (манифест, множество имен с хэшем) - одной ссылкой, чтобы reset был атомарным
+        self._state = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault('ASSETS_FINGERPRINT', True)
+        app.config.setdefault('ASSETS_DIR', os.path.join(app.static_folder, 'dist'))
+        app.url_defaults(self._url_defaults)
+        app.view_functions['static'] = self.send_static
+
+    @property
+    def enabled(self):
+        return self.app.config['ASSETS_FINGERPRINT'] and not self.app.debug
+
+    def _loaded(self):
+        state = self._state
+        if state is None:
+            with self._lock:
+                if self._state is None:
+                    manifest = self._load_manifest()
+                    self._state = (manifest, frozenset(manifest.values()))
+                state = self._state
+        return state
+
+    @property
+    def manifest(self):
+        return self._loaded()[0]
+
+    @property
+    def hashed_names(self):
+        return self._loaded()[1]
+
+    def _load_manifest(self):
+        static_dir, output_dir = self.app.static_folder, self.app.config['ASSETS_DIR']
+        path = os.path.join(output_dir, MANIFEST)
+        try:
+            built_at = os.path.getmtime(path)
+            if all(os.path.getmtime(source) <= built_at for _, source in _sources(static_dir, output_dir)):
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except FileNotFoundError:
+            pass
+        return build_assets(static_dir, output_dir)
+
+    def reset(self):
+        with self._lock:
+            self._state = None
+
+    def _url_defaults(self, endpoint, values):
+        if endpoint == 'static' and self.enabled:
+            hashed = self.manifest.get(values.get('filename'))
+            if hashed is not None:
+                values['filename'] = hashed
+
+    def send_static(self, filename):
+        if not self.enabled or filename not in self.hashed_names:
+            return self.app.send_static_file(filename)
+
+        directory = self.app.config['ASSETS_DIR']
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if request.accept_encodings[encoding] and os.path.exists(os.path.join(directory, filename + suffix)):
+                response = send_from_directory(directory, filename + suffix, mimetype=mimetype)
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(directory, filename, mimetype=mimetype)
+
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+        response.cache_control.no_cache = None
+        return response
@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict
+
+
+# Простой LRU кэш с ограничением по количеству записей
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Кэш отрендеренного HTML: карточки пользователей (id -> (версия, html))
+# и целые страницы списка (версия набора данных + URL -> html).
+# Подписан на репозиторий: при изменении или удалении пользователя
+# выбрасывается только его карточка, страницы - все, так как версия данных сменилась
+class FragmentCache:
+    def __init__(self, cards_size=10000, pages_size=100):
+        self.cards = LRUCache(cards_size)
+        self.pages = LRUCache(pages_size)
+
+    def card(self, user_id, version, render):
+        cached = self.cards.get(user_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        html = render()
+        self.cards.set(user_id, (version, html))
+        return html
+
+    # Полная перезагрузка данных: карточки не трогаем - версия карточки это
+    # хэш содержимого пользователя, неизменившиеся остаются верными
+    def reset(self):
+        self.pages.clear()
+
+    def add(self, user):
+        self.pages.clear()
+
+    def remove(self, user):
+        self.cards.pop(user['id'])
+        self.pages.clear()
@@ -0,0 +1,115 @@
+import operator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+DIVISION_BY_ZERO = "Division by zero"
+
+# Операции калькулятора. Неизвестная операция дает 0 (как было в /api/calculate)
+OPERATIONS = {
+    'add': operator.add,
+    'subtract': operator.sub,
+    'multiply': operator.mul,
+    'divide': operator.truediv,
+}
+
+
+class CalculationError(ValueError):
+    pass
+
+
+def to_number(value):
+    if not isinstance(value, (int, float, str)):
+        raise CalculationError(f"Invalid operand: {value!r}")
+    try:
+        return float(value)
+    except ValueError:
+        raise CalculationError(f"Invalid operand: {value!r}") from None
+
+
+# Операция из запроса: не строка (объект, массив) - тоже неизвестная операция
+def _operation(operation):
+    return OPERATIONS.get(operation) if isinstance(operation, str) else None
+
+
+# Одна операция. Деление на ноль - ZeroDivisionError
+def calculate_one(a, b, operation):
+    func = _operation(operation)
+    if func is None:
+        return 0
+    return func(to_number(a), to_number(b))
+
+
+# Скаляр растягивается до длины пакета, массивы должны быть одной длины
+def _column(name, value, size):
+    if not isinstance(value, list):
+        return [value] * size
+    if len(value) != size:
+        raise CalculationError(f"'{name}' has {len(value)} items, expected {size}")
+    return value
+
+
+# Пакет из массивов: {"a": [...], "b": [...], "operation": "add" или [...]}.
+# Возвращает (a, b, operations) - три списка одной длины
+def batch_columns(data, max_size):
+    sizes = [len(data[key]) for key in ('a', 'b', 'operation') if isinstance(data.get(key), list)]
+    if not sizes:
+        raise CalculationError("Batch needs at least one array among 'a', 'b', 'operation'")
+    size = max(sizes)
+    if size > max_size:
+        raise CalculationError(f"Batch is too large: {size} items, at most {max_size}")
+    return (_column('a', data.get('a', 0), size),
+            _column('b', data.get('b', 0), size),
+            _column('operation', data.get('operation', 'add'), size))
+
+
+# Пакет из объектов: [{"a": 1, "b": 2, "operation": "add"}, ...]
+def batch_items(items, max_size):
+    if len(items) > max_size:
+        raise CalculationError(f"Batch is too large: {len(items)} items, at most {max_size}")
+    for item in items:
+        if not isinstance(item, dict):
+            raise CalculationError(f"Batch item must be an object: {item!r}")
+    return ([item.get('a', 0) for item in items],
+            [item.get('b', 0) for item in items],
+            [item.get('operation', 'add') for item in items])
+
+
+# Пакетное вычисление. Элементы с одной операцией считаются вместе:
+# с NumPy - одной векторной операцией над массивами, без него - циклом.
+# Результат на каждый элемент - {"result": x} или {"error": "Division by zero"},
+# как ответ /api/calculate для одной операции
+def calculate_batch(a, b, operations):
+    a = [to_number(value) for value in a]
+    b = [to_number(value) for value in b]
+    results = [{"result": 0} for _ in operations]
+
+    groups = {}
+    for index, operation in enumerate(operations):
+        if _operation(operation) is not None:
+            groups.setdefault(operation, []).append(index)
+
+    for operation, indexes in groups.items():
+        func = OPERATIONS[operation]
+        if numpy is not None:
+            left = numpy.array([a[i] for i in indexes], dtype=numpy.float64)
+            right = numpy.array([b[i] for i in indexes], dtype=numpy.float64)
+            if operation == 'divide':
+                zero = right == 0
+                with numpy.errstate(divide='ignore', invalid='ignore'):
+                    values = numpy.divide(left, numpy.where(zero, 1.0, right))
+                zero = zero.tolist()
+            else:
+                values = func(left, right)
+                zero = None
+            for position, (index, value) in enumerate(zip(indexes, values.tolist())):
+                results[index] = {"error": DIVISION_BY_ZERO} if zero and zero[position] else {"result": value}
+        else:
+            for index in indexes:
+                try:
+                    results[index] = {"result": func(a[index], b[index])}
+                except ZeroDivisionError:
+                    results[index] = {"error": DIVISION_BY_ZERO}
+    return results
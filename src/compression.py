@@ -0,0 +1,133 @@
+import gzip
+import zlib
+
+from flask import request
+
+from src.cache import LRUCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Что сжимать: текстовые форматы. Картинки, шрифты, архивы уже сжаты
+COMPRESSIBLE_MIMETYPES = ('text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+                          'application/javascript', 'application/json', 'application/x-ndjson',
+                          'image/svg+xml')
+
+
+def _gzip_compress(data, level):
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _gzip_compressor(level):
+    # wbits=31 - формат gzip (заголовок и CRC), а не голый deflate
+    return zlib.compressobj(level, zlib.DEFLATED, 31)
+
+
+# Кодировки в порядке предпочтения сервера при равном q у клиента:
+# имя -> (сжатие bytes целиком, потоковый компрессор)
+CODINGS = {}
+if brotli is not None:
+    CODINGS['br'] = (lambda data, level: brotli.compress(data, quality=level),
+                     lambda level: brotli.Compressor(quality=level))
+if zstandard is not None:
+    CODINGS['zstd'] = (lambda data, level: zstandard.ZstdCompressor(level=level).compress(data),
+                       lambda level: zstandard.ZstdCompressor(level=level).compressobj())
+CODINGS['gzip'] = (_gzip_compress, _gzip_compressor)
+
+
+def _stream(chunks, compressor):
+    # brotli.Compressor: process/finish, zlib и zstandard: compress/flush
+    process = getattr(compressor, 'process', None) or compressor.compress
+    finish = getattr(compressor, 'finish', None) or compressor.flush
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = process(chunk)
+            if data:
+                yield data
+        yield finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+# Сжатие ответов по Accept-Encoding (br, zstd, gzip - что установлено).
+# Ответы меньше COMPRESS_MIN_SIZE не сжимаются: выигрыш меньше накладных
+# расходов. Потоковые ответы сжимаются по мере выдачи. У сжатого ответа
+# свой сильный ETag (исходный + "-gzip" и т.п.), а если исходный ETag
+# сильный - ответ привязан к версии данных, и сжатое тело кэшируется
+# по (ETag, кодировка): пока данные не изменились, сжатие не повторяется
+class ResponseCompressor:
+    def __init__(self, app=None):
+        self.cache = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+        # Уровни по умолчанию - компромисс между размером и временем CPU
+        app.config.setdefault('COMPRESS_LEVELS', {'br': 5, 'zstd': 3, 'gzip': 6})
+        app.config.setdefault('COMPRESS_CACHE_SIZE', 32)
+        self.cache = LRUCache(app.config['COMPRESS_CACHE_SIZE'])
+        app.after_request(self.after_request)
+
+    # Все ETag одного ресурса: исходный и по одному на каждую кодировку
+    def etag_variants(self, etag):
+        return [etag] + [f'{etag}-{coding}' for coding in CODINGS]
+
+    def negotiate(self):
+        return request.accept_encodings.best_match(list(CODINGS))
+
+    def compress(self, data, coding):
+        compress, _ = CODINGS[coding]
+        return compress(data, self.app.config['COMPRESS_LEVELS'][coding])
+
+    def after_request(self, response):
+        # 304 заменяет в кэше клиента сохраненный 200 и должен нести тот же Vary,
+        # иначе кэш может отдать сжатое тело клиенту без поддержки сжатия.
+        # У 304 от conditional() тип по умолчанию text/html, у статики - тип файла
+        if response.status_code == 304:
+            if response.mimetype in COMPRESSIBLE_MIMETYPES:
+                response.vary.add('Accept-Encoding')
+            return response
+        if (response.status_code != 200 or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or response.direct_passthrough or 'Content-Encoding' in response.headers
+                or 'Content-Range' in response.headers or response.cache_control.no_transform):
+            return response
+        # Тело зависит от Accept-Encoding, даже если именно этот клиент получит его несжатым
+        response.vary.add('Accept-Encoding')
+        coding = self.negotiate()
+        if coding is None:
+            return response
+
+        etag, weak = response.get_etag()
+        if response.is_streamed:
+            _, compressor = CODINGS[coding]
+            response.response = _stream(response.response, compressor(self.app.config['COMPRESS_LEVELS'][coding]))
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.app.config['COMPRESS_MIN_SIZE']:
+                return response
+            key = (etag, coding) if etag and not weak else None
+            body = self.cache.get(key) if key else None
+            if body is None:
+                body = self.compress(data, coding)
+                if key:
+                    self.cache.set(key, body)
+            response.set_data(body)
+
+        response.headers['Content-Encoding'] = coding
+        if etag:
+            response.set_etag(f'{etag}-{coding}', weak)
+        return response
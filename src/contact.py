@@ -0,0 +1,219 @@
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from src import jsoncodec
+
+logger = logging.getLogger(__name__)
+
+CONTACT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS contact_messages (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    email TEXT,
+    message TEXT,
+    created_at TEXT
+);
+"""
+
+
+# Сообщения построчно в JSON Lines: запись пачки - один write в конец файла
+class JsonLinesMessageStore:
+    def __init__(self, path):
+        self.path = path
+
+    def append_many(self, messages):
+        data = b''.join(jsoncodec.dumpb(message) + b'\n' for message in messages)
+        with open(self.path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                return [jsoncodec.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def close(self):
+        pass
+
+
+# Сообщения в SQLite: пачка - одна транзакция. Соединение открывается
+# в потоке, который пишет (поток записи очереди)
+class SqliteMessageStore:
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=30)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(CONTACT_SCHEMA)
+        return self._conn
+
+    def append_many(self, messages):
+        conn = self._connection()
+        with conn:
+            conn.executemany('INSERT OR IGNORE INTO contact_messages (id, name, email, message, created_at) '
+                             'VALUES (:id, :name, :email, :message, :created_at)', messages)
+
+    def load(self):
+        conn = self._connection()
+        rows = conn.execute('SELECT id, name, email, message, created_at FROM contact_messages ORDER BY rowid')
+        return [dict(zip(('id', 'name', 'email', 'message', 'created_at'), row)) for row in rows]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class _Flush:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+# Очередь сообщений с формы обратной связи. Обработчик запроса только кладет
+# сообщение в ограниченную очередь в памяти, поток записи забирает их пачками
+# (до batch_size или раз в flush_interval секунд) и дописывает в хранилище.
+# Поэтому время ответа /contact не зависит от хранилища, а всплески
+# сглаживаются очередью. Поток запускается при первом сообщении; после fork
+# (воркеры gunicorn) потоков родителя нет - запускается свой. Если поток
+# записи умер, следующее сообщение запускает новый на той же очереди.
+# При нормальном завершении процесса (atexit) close() дописывает все, что
+# в очереди, ожидая до 5 секунд; при SIGKILL или падении интерпретатора
+# неписанные сообщения теряются
+class MessageQueue:
+    def __init__(self, store_factory, maxsize=10000, batch_size=100, flush_interval=1.0, put_timeout=1.0):
+        # Функция, а не хранилище: настройки читаются при запуске потока
+        self.store_factory = store_factory
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._atexit_pid = None
+
+    def _ensure_worker(self):
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid != pid:
+                # После fork очередь родителя не наша: ее блокировка могла
+                # остаться захваченной потоком, которого в этом процессе нет
+                self._queue = queue.Queue(self.maxsize)
+                self._thread = None
+                self._pid = pid
+            if self._thread is None or not self._thread.is_alive():
+                if self._thread is not None:
+                    logger.error('Contact writer thread died, restarting')
+                # Очередь та же: ждущие в ней сообщения запишет новый поток
+                self._thread = threading.Thread(target=self._run, args=(self._queue,),
+                                                name='contact-writer', daemon=True)
+                self._thread.start()
+                # Поток фоновый: при выходе из процесса дописываем то, что в очереди
+                if self._atexit_pid != pid:
+                    atexit.register(self.close, 5)
+                    self._atexit_pid = pid
+
+    # Если очередь заполнена и не освободилась за put_timeout - queue.Full
+    def put(self, message):
+        self._ensure_worker()
+        self._queue.put(message, timeout=self.put_timeout)
+
+    # Дождаться записи всего, что уже в очереди
+    def flush(self, timeout=None):
+        if self._pid != os.getpid():
+            return True
+        self._ensure_worker()
+        marker = _Flush()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # Очередь может быть заполнена, а хранилище недоступно - не ждем дольше timeout
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    # Дописать очередь и остановить поток. Следующее сообщение запустит его снова.
+    # Вызывается и при выходе из процесса, поэтому ждет не дольше timeout
+    def close(self, timeout=None):
+        if self._pid != os.getpid() or self._thread is None:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.error('Contact queue is full, %d messages are not saved', self._queue.qsize())
+            return
+        self._thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        if not self._thread.is_alive():
+            self._thread = None
+
+    def _run(self, messages):
+        try:
+            store = self.store_factory()
+        except Exception:
+            # Сообщения остаются в очереди до перезапуска потока
+            logger.exception('Cannot open contact message store, writer stopped')
+            return
+        batch = []
+        waiting = []
+        deadline = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                item = None
+                # Пока пачка не записалась (ошибка хранилища), новые сообщения ждут в очереди
+                if len(batch) < self.batch_size:
+                    try:
+                        item = messages.get(timeout=timeout)
+                    except queue.Empty:
+                        pass
+                else:
+                    time.sleep(timeout)
+
+                if isinstance(item, _Flush):
+                    waiting.append(item)
+                elif item is not None and item is not _STOP:
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+
+                if batch and (len(batch) >= self.batch_size or waiting or item is _STOP
+                              or time.monotonic() >= deadline):
+                    if self._write(store, batch):
+                        batch = []
+                        deadline = None
+                    else:
+                        deadline = time.monotonic() + self.flush_interval
+                if not batch:
+                    for marker in waiting:
+                        marker.done.set()
+                    waiting = []
+                if item is _STOP:
+                    break
+        finally:
+            store.close()
+
+    def _write(self, store, batch):
+        try:
+            store.append_many(batch)
+        except Exception:
+            logger.exception('Failed to save %d contact messages, will retry', len(batch))
+            return False
+        return True
@@ -0,0 +1,177 @@
+import ast
+import math
+import operator
+
+from src.cache import LRUCache
+from src.calculator import DIVISION_BY_ZERO, CalculationError, calculate_one, to_number
+
+# Длиннее выражения не разбираются: парсер рекурсивный
+MAX_EXPRESSION_LENGTH = 1000
+
+# math.pow вместо **: для отрицательного основания с дробной степенью
+# ошибка, а не комплексное число
+_BINARY = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: math.pow,
+}
+_UNARY = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+# Функции: имя -> (функция, наименьшее и наибольшее число аргументов)
+FUNCTIONS = {
+    'abs': (abs, 1, 1),
+    'sqrt': (math.sqrt, 1, 1),
+    'exp': (math.exp, 1, 1),
+    'log': (math.log, 1, 2),
+    'log2': (math.log2, 1, 1),
+    'log10': (math.log10, 1, 1),
+    'sin': (math.sin, 1, 1),
+    'cos': (math.cos, 1, 1),
+    'tan': (math.tan, 1, 1),
+    'asin': (math.asin, 1, 1),
+    'acos': (math.acos, 1, 1),
+    'atan': (math.atan, 1, 1),
+    'atan2': (math.atan2, 2, 2),
+    'hypot': (math.hypot, 1, None),
+    # math.floor/ceil возвращают int: произведение таких чисел растет без ограничений
+    'floor': (lambda x: float(math.floor(x)), 1, 1),
+    'ceil': (lambda x: float(math.ceil(x)), 1, 1),
+    'round': (lambda x, digits=0: round(x, int(digits)), 1, 2),
+    'min': (min, 2, None),
+    'max': (max, 2, None),
+}
+CONSTANTS = {'pi': math.pi, 'e': math.e, 'tau': math.tau}
+
+
+class ExpressionError(CalculationError):
+    pass
+
+
+# Разобранное выражение: дерево ast превращено в вложенные замыкания,
+# поэтому вычисление - только вызовы функций, без обхода дерева и без eval
+class Expression:
+    __slots__ = ('source', 'variables', '_evaluate')
+
+    def __init__(self, source, variables, evaluate):
+        self.source = source
+        self.variables = variables
+        self._evaluate = evaluate
+
+    def evaluate(self, variables=None):
+        variables = variables or {}
+        if not isinstance(variables, dict):
+            raise ExpressionError("Variables must be an object")
+        missing = sorted(self.variables - variables.keys())
+        if missing:
+            raise ExpressionError(f"Unknown variable: {', '.join(missing)}")
+        env = {name: to_number(variables[name]) for name in self.variables}
+        try:
+            # Результат - всегда float, даже если функция вернула int
+            result = float(self._evaluate(env))
+        except (ValueError, OverflowError) as e:
+            raise ExpressionError(f"Math error: {e}") from None
+        if not math.isfinite(result):
+            raise ExpressionError("Math error: result out of range")
+        return result
+
+
+def _compile(node, names):
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ExpressionError(f"Unsupported constant: {node.value!r}")
+        # Только float: 10 ** 10 ** 10 на целых считалось бы вечно
+        value = float(node.value)
+        return lambda env: value
+
+    if isinstance(node, ast.Name):
+        if node.id in CONSTANTS:
+            value = CONSTANTS[node.id]
+            return lambda env: value
+        name = node.id
+        names.add(name)
+        return lambda env: env[name]
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+        func = _BINARY[type(node.op)]
+        left, right = _compile(node.left, names), _compile(node.right, names)
+        return lambda env: func(left(env), right(env))
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY:
+        func = _UNARY[type(node.op)]
+        operand = _compile(node.operand, names)
+        return lambda env: func(operand(env))
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+            raise ExpressionError(f"Unknown function: {ast.unparse(node.func)}")
+        if node.keywords or any(isinstance(arg, ast.Starred) for arg in node.args):
+            raise ExpressionError(f"Only positional arguments are allowed: {node.func.id}")
+        func, min_args, max_args = FUNCTIONS[node.func.id]
+        if len(node.args) < min_args or (max_args is not None and len(node.args) > max_args):
+            raise ExpressionError(f"Wrong number of arguments for {node.func.id}: {len(node.args)}")
+        args = [_compile(arg, names) for arg in node.args]
+        return lambda env: func(*(arg(env) for arg in args))
+
+    raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+
+
+# Разбор строки в Expression. Разрешены числа, переменные, константы pi/e/tau,
+# + - * / // % ** ^, скобки и функции из FUNCTIONS - больше ничего
+def compile_expression(source):
+    if not isinstance(source, str) or not source.strip():
+        raise ExpressionError("Expression must be a non-empty string")
+    if len(source) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"Expression is too long: at most {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        # ^ - степень, как принято в калькуляторах (а не XOR, как в Python),
+        # с приоритетом и правой ассоциативностью **. Строк в выражении нет,
+        # поэтому замена по тексту безопасна
+        tree = ast.parse(source.strip().replace('^', '**'), mode='eval')
+        names = set()
+        evaluate = _compile(tree.body, names)
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression: {e.msg}") from None
+    except (RecursionError, MemoryError):
+        raise ExpressionError("Expression is too deeply nested") from None
+    return Expression(source, frozenset(names), evaluate)
+
+
+# Кэш разобранных выражений: одна и та же формула с разными значениями
+# переменных разбирается один раз
+class ExpressionCompiler:
+    def __init__(self, cache_size=1024):
+        self.cache = LRUCache(cache_size)
+
+    def compile(self, source):
+        if not isinstance(source, str):
+            return compile_expression(source)
+        expression = self.cache.get(source)
+        if expression is None:
+            expression = compile_expression(source)
+            self.cache.set(source, expression)
+        return expression
+
+    # Пакет: объекты {"expression", "variables"} и/или {"a", "b", "operation"}.
+    # Ошибка в одном элементе не мешает остальным
+    def evaluate_items(self, items, max_size):
+        if len(items) > max_size:
+            raise CalculationError(f"Batch is too large: {len(items)} items, at most {max_size}")
+        results = []
+        for item in items:
+            if not isinstance(item, dict):
+                raise CalculationError(f"Batch item must be an object: {item!r}")
+            try:
+                if 'expression' in item:
+                    value = self.compile(item['expression']).evaluate(item.get('variables'))
+                else:
+                    value = calculate_one(item.get('a', 0), item.get('b', 0), item.get('operation', 'add'))
+                results.append({"result": value})
+            except ZeroDivisionError:
+                results.append({"error": DIVISION_BY_ZERO})
+            except CalculationError as e:
+                results.append({"error": str(e)})
+        return results
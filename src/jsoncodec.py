@@ -0,0 +1,117 @@
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    # Без orjson все работает на стандартном json, только медленнее
+    orjson = None
+
+
+# Объекты с to_dict (например, models.User) сериализуются как словарь
+def _default(obj):
+    to_dict = getattr(obj, 'to_dict', None)
+    if to_dict is None:
+        raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+    return to_dict()
+
+
+def _orjson_option(indent, sort_keys):
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return option
+
+
+# JSON в bytes (UTF-8). indent=None - компактно, без пробелов между элементами
+def dumpb(obj, indent=None, sort_keys=False):
+    # orjson умеет только отступ в 2 пробела
+    if orjson is not None and indent in (None, 2):
+        try:
+            return orjson.dumps(obj, default=_default, option=_orjson_option(indent, sort_keys))
+        except TypeError:
+            # Например, целые больше 64 бит - их понимает только стандартный json
+            pass
+    return dumps_stdlib(obj, indent, sort_keys).encode('utf-8')
+
+
+def dumps(obj, indent=None, sort_keys=False):
+    if orjson is not None and indent in (None, 2):
+        try:
+            return orjson.dumps(obj, default=_default, option=_orjson_option(indent, sort_keys)).decode('utf-8')
+        except TypeError:
+            pass
+    return dumps_stdlib(obj, indent, sort_keys)
+
+
+def dumps_stdlib(obj, indent=None, sort_keys=False):
+    separators = None if indent else (',', ':')
+    return json.dumps(obj, ensure_ascii=False, indent=indent, sort_keys=sort_keys, separators=separators,
+                      default=_default)
+
+
+# str или bytes
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Файл, открытый в бинарном или текстовом режиме
+def load(f):
+    return loads(f.read())
+
+
+# JSON провайдер Flask (jsonify, request.get_json, фильтр tojson) на orjson.
+# Поведение как у стандартного: даты в формате HTTP, сортировка ключей;
+# если orjson не справился с объектом, работает стандартный провайдер
+class JSONProvider(DefaultJSONProvider):
+    ensure_ascii = False
+
+    @staticmethod
+    def default(o):
+        if hasattr(o, 'to_dict'):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        option = self._orjson_option(kwargs) if orjson is not None else None
+        if option is not None:
+            try:
+                return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode('utf-8')
+            except TypeError:
+                pass
+        return super().dumps(obj, **kwargs)
+
+    # Параметры json.dumps, которые передает Flask (jsonify - separators или indent,
+    # фильтр tojson - sort_keys), в флаги orjson. None - orjson так не умеет
+    def _orjson_option(self, kwargs):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        for key, value in kwargs.items():
+            if key in ('sort_keys', 'default'):
+                continue
+            if key == 'indent':
+                if value == 2:
+                    option |= orjson.OPT_INDENT_2
+                elif value is not None:
+                    return None
+            elif key == 'separators':
+                # orjson пишет компактно, а с отступом - как json.dumps с indent
+                if tuple(value) not in ((',', ':'), (',', ': ')):
+                    return None
+            elif key == 'ensure_ascii':
+                if value:
+                    return None
+            else:
+                return None
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
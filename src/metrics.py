@@ -0,0 +1,149 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Границы корзин гистограмм длительности, секунды
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+# Остальные методы клиент может придумать сколько угодно - каждый дал бы
+# новую серию, поэтому они считаются вместе под "other"
+HTTP_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'CONNECT', 'TRACE'))
+
+
+# Гистограмма с фиксированными корзинами: память не растет с числом запросов.
+# Квантили оцениваются по корзинам (как histogram_quantile в Prometheus)
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        # Корзина - первая граница, не меньшая значения (le в Prometheus)
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for position, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                if position == len(self.buckets):
+                    # Хвост за последней границей - точнее не оценить
+                    return self.buckets[-1]
+                lower = self.buckets[position - 1] if position else 0.0
+                upper = self.buckets[position]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _bound(value):
+    return '+Inf' if value == float('inf') else repr(value)
+
+
+# Метрики процесса: запросы по endpoint (количество по статусам, длительность)
+# и время внутренних операций (чтение/запись пользователей, шаблоны).
+# У каждого воркера gunicorn свои метрики
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._requests = {}
+            self._latency = {}
+            self._operations = {}
+
+    def observe_request(self, endpoint, method, status, seconds):
+        if method not in HTTP_METHODS:
+            method = 'other'
+        with self._lock:
+            key = (endpoint, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            histogram = self._latency.get(endpoint)
+            if histogram is None:
+                histogram = self._latency[endpoint] = Histogram()
+            histogram.observe(seconds)
+
+    def observe(self, operation, seconds):
+        with self._lock:
+            histogram = self._operations.get(operation)
+            if histogram is None:
+                histogram = self._operations[operation] = Histogram()
+            histogram.observe(seconds)
+
+    # Замер операции: with metrics.timer('load_users'): ...
+    @contextmanager
+    def timer(self, operation):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(operation, time.perf_counter() - start)
+
+    # Декоратор для функций: @metrics.timed('save_users')
+    def timed(self, operation):
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(operation):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # Текстовый формат Prometheus
+    def render(self):
+        lines = []
+        with self._lock:
+            lines.append('# HELP http_requests_total Number of HTTP requests.')
+            lines.append('# TYPE http_requests_total counter')
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                lines.append(f'http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}')
+
+            self._render_histograms(lines, 'http_request_duration_seconds', 'HTTP request latency.',
+                                    'endpoint', self._latency)
+            self._render_histograms(lines, 'app_operation_duration_seconds',
+                                    'Time spent in storage and template rendering.',
+                                    'operation', self._operations)
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _render_histograms(lines, name, help_text, label, histograms):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for key, histogram in sorted(histograms.items()):
+            for bound, total in histogram.cumulative():
+                lines.append(f'{name}_bucket{_labels(**{label: key, "le": _bound(bound)})} {total}')
+            lines.append(f'{name}_sum{_labels(**{label: key})} {histogram.sum!r}')
+            lines.append(f'{name}_count{_labels(**{label: key})} {histogram.count}')
+
+        # Готовые p50/p95/p99, чтобы видеть их без PromQL
+        lines.append(f'# HELP {name}_quantile Quantiles of {name} estimated from the buckets.')
+        lines.append(f'# TYPE {name}_quantile gauge')
+        for key, histogram in sorted(histograms.items()):
+            for q in QUANTILES:
+                value = histogram.quantile(q)
+                if value is not None:
+                    lines.append(f'{name}_quantile{_labels(**{label: key, "quantile": q})} {value!r}')
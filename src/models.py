@@ -0,0 +1,83 @@
+import sys
+from dataclasses import dataclass
+
+# Поля пользователя в порядке вывода в JSON
+USER_FIELDS = ('id', 'name', 'email', 'age', 'phone', 'city', 'created_at', 'updated_at')
+# Строки, которые повторяются у многих пользователей: храним одну копию
+_INTERNED_FIELDS = ('city', 'created_at', 'updated_at')
+
+
+# Пользователь в памяти. __slots__ вместо dict: нет хэш-таблицы на каждую
+# запись, а повторяющиеся строки (город, даты) общие. Отсутствующее поле - None.
+# Поддерживает чтение как у dict (user['name'], user.get('city')), поэтому
+# код репозитория и шаблоны работают с ним так же, как со словарем.
+# В dict превращается только на границе: JSON (to_dict) и хранилище
+@dataclass(slots=True, eq=False)
+class User:
+    id: int
+    name: str = None
+    email: str = None
+    age: int = None
+    phone: str = None
+    city: str = None
+    created_at: str = None
+    updated_at: str = None
+    # Поля, о которых модель не знает (сохраняются как есть)
+    extra: dict = None
+
+    @classmethod
+    def from_dict(cls, data):
+        user = cls(data['id'])
+        user.update(data)
+        return user
+
+    def update(self, data):
+        for key, value in data.items():
+            if key in USER_FIELDS:
+                if key in _INTERNED_FIELDS and isinstance(value, str):
+                    value = sys.intern(value)
+                setattr(self, key, value)
+            elif value is None:
+                if self.extra:
+                    self.extra.pop(key, None)
+            else:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+
+    def to_dict(self):
+        data = {}
+        for key in USER_FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                data[key] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def get(self, key, default=None):
+        if key in USER_FIELDS:
+            value = getattr(self, key)
+        elif self.extra:
+            value = self.extra.get(key)
+        else:
+            value = None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __eq__(self, other):
+        if isinstance(other, User):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
@@ -0,0 +1,137 @@
+import cProfile
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+
+from werkzeug.wrappers import Request
+
+logger = logging.getLogger(__name__)
+
+# Сколько самых горячих функций попадает в заголовок и лог
+TOP_FUNCTIONS = 8
+# Ограничения на разворачивание графа вызовов в стеки
+MAX_DEPTH = 64
+MIN_MICROSECONDS = 1
+
+
+def _label(func):
+    filename, line, name = func
+    if filename == '~':
+        # Встроенные функции: "<method 'read' of '_io.BufferedReader' objects>"
+        return name.replace(';', ',')
+    return f'{name} ({os.path.basename(filename)}:{line})'.replace(';', ',')
+
+
+# Самые затратные функции по собственному времени (без вызванных из них)
+def top_functions(stats, limit=TOP_FUNCTIONS):
+    entries = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+    return [(_label(func), tottime, calls) for func, (_, calls, tottime, _, _) in entries[:limit]]
+
+
+# Стеки в формате collapsed ("a;b;c <микросекунды>") для flamegraph.pl,
+# speedscope и т.п. cProfile хранит только пары вызывающий-вызываемый,
+# поэтому время вызываемой функции делится между путями пропорционально
+# времени, проведенному в ней из каждого вызывающего
+def collapsed_stacks(stats):
+    entries = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[func] = edge
+    stacks = Counter()
+
+    def walk(func, path, share, visiting):
+        _, _, tottime, cumtime, _ = entries[func]
+        path = path + (_label(func),)
+        microseconds = int(tottime * share * 1e6)
+        if microseconds >= MIN_MICROSECONDS:
+            stacks[';'.join(path)] += microseconds
+        if len(path) >= MAX_DEPTH:
+            return
+        visiting.add(func)
+        for callee, edge in callees.get(func, {}).items():
+            callee_cumtime = entries[callee][3]
+            if callee in visiting or not callee_cumtime:
+                continue
+            callee_share = share * edge[3] / callee_cumtime
+            if callee_share * callee_cumtime * 1e6 >= MIN_MICROSECONDS:
+                walk(callee, path, callee_share, visiting)
+        visiting.discard(func)
+
+    for func, (_, _, _, _, callers) in entries.items():
+        if not callers:
+            walk(func, (), 1.0, set())
+    return [f'{stack} {value}' for stack, value in stacks.most_common()]
+
+
+# WSGI middleware: запрос, для которого should_profile(request) вернул True,
+# выполняется под cProfile. Рядом с профилем (*.prof для pstats/snakeviz)
+# пишется *.collapsed для flamegraph, горячие функции уходят в лог
+# и в заголовки ответа X-Profile-Top / X-Profile-File
+class RequestProfiler:
+    def __init__(self, wsgi_app, should_profile, output_dir):
+        self.wsgi_app = wsgi_app
+        self.should_profile = should_profile
+        # Функция, а не строка: каталог читается из конфигурации в момент запроса
+        self.output_dir = output_dir
+        # cProfile может быть активен только один на процесс
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        if not self.should_profile(Request(environ)):
+            return self.wsgi_app(environ, start_response)
+        if not self._lock.acquire(blocking=False):
+            logger.warning('Profiler is busy, %s served without profiling', environ.get('PATH_INFO'))
+            return self.wsgi_app(environ, start_response)
+
+        try:
+            response = {}
+
+            def capture_start_response(status, headers, exc_info=None):
+                response['args'] = [status, headers, exc_info]
+                return start_response(status, headers, exc_info) if response.get('sent') else None
+
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            result = profiler.runcall(self.wsgi_app, environ, capture_start_response)
+            elapsed = time.perf_counter() - started
+            headers = self._save(profiler, environ, elapsed)
+        finally:
+            self._lock.release()
+
+        response['sent'] = True
+        if 'args' not in response:
+            # Приложение вызовет start_response только при чтении тела - заголовки не добавить
+            return result
+        status, response_headers, exc_info = response['args']
+        start_response(status, list(response_headers) + headers, exc_info)
+        return result
+
+    def _save(self, profiler, environ, elapsed):
+        stats = pstats.Stats(profiler)
+        top = top_functions(stats)
+
+        directory = self.output_dir()
+        os.makedirs(directory, exist_ok=True)
+        path = environ.get('PATH_INFO', '/')
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', path).strip('_') or 'root'
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{environ.get('REQUEST_METHOD', 'GET')}-{slug}-{uuid.uuid4().hex[:8]}"
+        base = os.path.join(directory, name)
+        stats.dump_stats(base + '.prof')
+        with open(base + '.collapsed', 'w', encoding='utf-8') as f:
+            f.write('\n'.join(collapsed_stacks(stats)) + '\n')
+
+        logger.info('Profile of %s %s (%.1f ms) saved to %s.collapsed; top functions:\n%s',
+                    environ.get('REQUEST_METHOD'), path, elapsed * 1000, base,
+                    '\n'.join(f'  {tottime * 1000:8.2f} ms {calls:8} calls  {label}' for label, tottime, calls in top))
+
+        summary = ', '.join(f'{label} {tottime * 1000:.2f}ms' for label, tottime, _ in top[:5])
+        return [('X-Profile-Time', f'{elapsed * 1000:.2f}ms'),
+                ('X-Profile-File', os.path.basename(base) + '.collapsed'),
+                # Заголовки - только latin-1
+                ('X-Profile-Top', summary.encode('ascii', 'replace').decode('ascii'))]
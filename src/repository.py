@@ -0,0 +1,382 @@
+import hashlib
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from datetime import datetime
+
+from src import jsoncodec
+from src.models import User
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _email_key(email):
+    return (email or '').strip().casefold()
+
+
+# Поля, по которым можно сортировать список пользователей
+SORT_FIELDS = ('id', 'name', 'age', 'city', 'created_at')
+
+
+# Поля сортировки с числовыми значениями; остальные сравниваются как строки
+_NUMERIC_SORT_FIELDS = ('id', 'age')
+
+
+def _sort_key(user, field):
+    value = user.get(field)
+    # Ключи одного поля всегда одного типа: иначе bisect/insort упадет
+    # на сравнении int со str, если в данные попало значение не того типа
+    if field in _NUMERIC_SORT_FIELDS:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            value = None
+    elif value is not None:
+        value = str(value).casefold()
+    # Пустые значения всегда в конце, id делает ключ уникальным
+    return value is None or value == '', value if value is not None else '', user['id']
+
+
+def _city_key(city):
+    return (city or '').strip().casefold()
+
+
+# Время последнего изменения пользователя (updated_at или created_at) как timestamp
+def user_modified_at(user):
+    value = user.get('updated_at') or user.get('created_at')
+    if not value:
+        return None
+    try:
+        return time.mktime(time.strptime(value, "%Y-%m-%d %H:%M:%S"))
+    except ValueError:
+        return None
+
+
+class DuplicateEmailError(ValueError):
+    pass
+
+
+# Репозиторий пользователей: держит данные в памяти и перечитывает
+# хранилище только тогда, когда оно изменилось на диске.
+# Поиск по id и email и выдача нового id работают за O(1)
+class UserRepository:
+    def __init__(self, storage):
+        self._lock = threading.RLock()
+        self._next_id = 1
+        self._listeners = []
+        self._unsaved_changes = 0
+        self.open(storage)
+
+    # Подписка на изменения данных (например, поисковый индекс).
+    # Слушатель получает reset() при полной перезагрузке, add(user) и remove(user)
+    def subscribe(self, listener):
+        with self._lock:
+            self._listeners.append(listener)
+            listener.reset()
+            for user in self._by_id.values():
+                listener.add(user)
+
+    # Подключение (или переключение) хранилища с полной перезагрузкой данных
+    def open(self, storage):
+        with self._lock:
+            self.storage = storage
+            self._signature = None
+            self._next_id = 1
+            self.refresh()
+
+    # Перечитываем данные, если хранилище изменилось (для файлов - inode,
+    # размер, mtime). Отпечаток снимаем до чтения: если файл поменяется
+    # во время чтения, следующий refresh это заметит
+    def refresh(self):
+        signature = self.storage.signature()
+        if signature is not None and signature == self._signature:
+            return
+        with self._lock:
+            # Хранилище умеет отдавать только изменения (SQLite, журнал) - не читаем
+            # все заново. None - изменения получить нельзя (например, журнал сжат)
+            changes = None
+            if self._signature is not None and hasattr(self.storage, 'changes_since'):
+                changes = self.storage.changes_since(self._signature)
+            if changes is not None:
+                self._apply_changes(*changes)
+            else:
+                self._build_indexes(self.storage.load())
+            self._set_signature(signature)
+
+    # Версия данных считается от отпечатка хранилища, поэтому у всех
+    # процессов, видящих один и тот же файл, она одинаковая
+    def _set_signature(self, signature):
+        if signature is not None and signature == self._signature:
+            # Изменение не отразилось на диске (например, запись подменена в тестах)
+            self._unsaved_changes += 1
+        self._signature = signature
+        self._version = hashlib.sha1(repr((signature, self._unsaved_changes)).encode()).hexdigest()[:20]
+        self._changed_at = time.time()
+
+    # Версия набора данных: меняется при каждом сохранении
+    @property
+    def version(self):
+        self.refresh()
+        return self._version
+
+    # Когда этот процесс последний раз видел изменение данных (timestamp)
+    @property
+    def last_modified(self):
+        self.refresh()
+        return self._changed_at
+
+    # Версия одного пользователя - хэш его данных
+    def user_version(self, user_id):
+        self.refresh()
+        version = self._user_versions.get(user_id)
+        if version is None:
+            user = self._by_id.get(user_id)
+            if user is None:
+                return None
+            content = jsoncodec.dumpb(user.to_dict(), sort_keys=True)
+            version = hashlib.sha1(content).hexdigest()[:20]
+            self._user_versions[user_id] = version
+        return version
+
+    # Цикл чтение-изменение-запись: блокировка потоков и других процессов,
+    # затем подтягиваем изменения, сделанные другими процессами
+    @contextmanager
+    def _writing(self):
+        with self._lock, self.storage.lock():
+            self.refresh()
+            try:
+                yield
+            except BaseException:
+                # Индексы в памяти могли измениться наполовину - перечитаем хранилище
+                self._signature = None
+                raise
+
+    def _build_indexes(self, users):
+        # dict сохраняет порядок вставки, поэтому он же служит списком пользователей
+        self._by_id = {}
+        self._by_email = {}
+        self._by_city = {}
+        self._user_versions = {}
+        # Отсортированные списки ключей (значение, id) по полям сортировки.
+        # Строятся при первом запросе и дальше поддерживаются через bisect
+        self._orderings = {}
+        # Отфильтрованные упорядочения: (поле, фильтры) -> ключи; сбрасываются при любом изменении
+        self._filtered = {}
+        for listener in self._listeners:
+            listener.reset()
+        for user in users:
+            self._index(User.from_dict(user))
+
+    def _apply_changes(self, upserts, deleted_ids):
+        for user_id in deleted_ids:
+            user = self._by_id.pop(user_id, None)
+            if user is not None:
+                self._unindex(user)
+        for user in upserts:
+            old = self._by_id.pop(user['id'], None)
+            if old is not None:
+                self._unindex(old)
+            self._index(User.from_dict(user))
+
+    def _index(self, user):
+        # Сначала упорядочения: если здесь ошибка, словари еще не тронуты
+        for field, ordering in self._orderings.items():
+            insort(ordering, _sort_key(user, field))
+        self._filtered.clear()
+        self._by_id[user['id']] = user
+        self._user_versions.pop(user['id'], None)
+        self._by_email[_email_key(user.get('email'))] = user['id']
+        self._by_city.setdefault(_city_key(user.get('city')), set()).add(user['id'])
+        for listener in self._listeners:
+            listener.add(user)
+        # Счетчик id только растет, чтобы не выдавать id удаленных пользователей повторно
+        if user['id'] >= self._next_id:
+            self._next_id = user['id'] + 1
+
+    # Убирает пользователя из всех индексов, кроме _by_id
+    def _unindex(self, user):
+        self._filtered.clear()
+        self._user_versions.pop(user['id'], None)
+        key = _email_key(user.get('email'))
+        if self._by_email.get(key) == user['id']:
+            del self._by_email[key]
+        city_ids = self._by_city.get(_city_key(user.get('city')))
+        if city_ids is not None:
+            city_ids.discard(user['id'])
+            if not city_ids:
+                del self._by_city[_city_key(user.get('city'))]
+        for field, ordering in self._orderings.items():
+            key = _sort_key(user, field)
+            position = bisect_left(ordering, key)
+            if position < len(ordering) and ordering[position] == key:
+                del ordering[position]
+        for listener in self._listeners:
+            listener.remove(user)
+
+    def _ordering(self, field):
+        ordering = self._orderings.get(field)
+        if ordering is None:
+            ordering = sorted(_sort_key(user, field) for user in self._by_id.values())
+            self._orderings[field] = ordering
+        return ordering
+
+    def all(self):
+        self.refresh()
+        return list(self._by_id.values())
+
+    def count(self):
+        self.refresh()
+        return len(self._by_id)
+
+    def get(self, user_id):
+        self.refresh()
+        return self._by_id.get(user_id)
+
+    def email_taken(self, email, exclude_id=None):
+        self.refresh()
+        owner = self._by_email.get(_email_key(email))
+        return owner is not None and owner != exclude_id
+
+    # Страница пользователей по заранее отсортированному индексу.
+    # Пагинация либо по offset/limit, либо курсором after_id (id последнего
+    # пользователя на предыдущей странице). ids - ограничить выборку этими id
+    # (например, результатами поиска). Возвращает (пользователи, всего)
+    def query(self, sort='id', descending=False, city=None, min_age=None, max_age=None,
+              offset=0, limit=None, after_id=None, ids=None):
+        if sort not in SORT_FIELDS:
+            raise ValueError(f'Unknown sort field: {sort}')
+        self.refresh()
+        with self._lock:
+            keys = self._ordering(sort)
+            filter_key = (sort, _city_key(city) if city else None, min_age, max_age)
+            if ids is None and filter_key in self._filtered:
+                keys = self._filtered[filter_key]
+            else:
+                candidates = self._filter_ids(city, min_age, max_age)
+                if ids is not None:
+                    ids = {user_id for user_id in ids if user_id in self._by_id}
+                    candidates = ids if candidates is None else candidates & ids
+                if candidates is not None:
+                    keys = self._ordered_subset(keys, candidates, sort)
+                    if ids is None:
+                        if len(self._filtered) >= 64:
+                            self._filtered.clear()
+                        self._filtered[filter_key] = keys
+            total = len(keys)
+
+            # Окно считаем в позициях возрастающего списка, чтобы не разворачивать его
+            if descending:
+                if after_id is not None:
+                    high = bisect_left(keys, self._cursor_key(after_id, sort))
+                else:
+                    high = max(total - offset, 0)
+                low = 0 if limit is None else max(high - limit, 0)
+                page = keys[low:high][::-1]
+            else:
+                if after_id is not None:
+                    low = bisect_right(keys, self._cursor_key(after_id, sort))
+                else:
+                    low = offset
+                page = keys[low:] if limit is None else keys[low:low + limit]
+            users = [self._by_id[key[2]] for key in page]
+        return users, total
+
+    # Ключи сортировки для части пользователей. Немного кандидатов (например,
+    # результаты поиска) дешевле отсортировать, много - выбрать проходом
+    # по готовому упорядочению, не сортируя заново
+    def _ordered_subset(self, ordering, candidates, sort):
+        if len(candidates) * 8 < len(ordering):
+            return sorted(_sort_key(self._by_id[user_id], sort) for user_id in candidates)
+        return [key for key in ordering if key[2] in candidates]
+
+    # id пользователей, подходящих под фильтры, или None, если фильтров нет
+    def _filter_ids(self, city, min_age, max_age):
+        candidates = None
+        if city:
+            candidates = set(self._by_city.get(_city_key(city), ()))
+        if min_age is not None or max_age is not None:
+            ages = self._ordering('age')
+            low = bisect_left(ages, (False, min_age, 0)) if min_age is not None else 0
+            if max_age is not None:
+                high = bisect_right(ages, (False, max_age, float('inf')))
+            else:
+                high = bisect_left(ages, (True,))
+            age_ids = {key[2] for key in ages[low:high]}
+            candidates = age_ids if candidates is None else candidates & age_ids
+        return candidates
+
+    def _cursor_key(self, after_id, sort):
+        user = self._by_id.get(after_id)
+        if user is None:
+            if sort != 'id':
+                raise KeyError(after_id)
+            # Курсор по id работает и для уже удаленного пользователя
+            user = {'id': after_id}
+        return _sort_key(user, sort)
+
+    def add(self, user):
+        with self._writing():
+            if self.email_taken(user.get('email')):
+                raise DuplicateEmailError(user.get('email'))
+            user = User.from_dict(dict(user, id=self._next_id))
+            if user.created_at is None:
+                user.created_at = _now()
+            self._index(user)
+            self._persist([('create', user)])
+        return user
+
+    # Пакетное добавление: id выдаются за один проход, запись в хранилище одна.
+    # Возвращает (добавленные пользователи, номера записей с занятым email)
+    def add_many(self, users):
+        created = []
+        duplicates = []
+        with self._writing():
+            created_at = _now()
+            for position, user in enumerate(users):
+                if self.email_taken(user.get('email')):
+                    duplicates.append(position)
+                    continue
+                user = User.from_dict(dict(user, id=self._next_id))
+                if user.created_at is None:
+                    user.created_at = created_at
+                self._index(user)
+                created.append(user)
+            if created:
+                self._persist([('create', user) for user in created])
+        return created, duplicates
+
+    def update(self, user_id, fields):
+        with self._writing():
+            user = self._by_id.get(user_id)
+            if user is None:
+                return None
+            if 'email' in fields and self.email_taken(fields['email'], exclude_id=user_id):
+                raise DuplicateEmailError(fields['email'])
+            self._unindex(user)
+            user.update(fields)
+            user.updated_at = _now()
+            self._index(user)
+            self._persist([('update', user)])
+        return user
+
+    def delete(self, user_id):
+        with self._writing():
+            user = self._by_id.pop(user_id, None)
+            if user is None:
+                return None
+            self._unindex(user)
+            self._persist([('delete', user)])
+        return user
+
+    # Хранилище само решает, переписать ли все данные или дописать только изменения.
+    # Хранилища работают со словарями, в памяти - компактные User
+    def _persist(self, changes):
+        changes = [(op, user.to_dict()) for op, user in changes]
+        try:
+            self.storage.commit(changes, lambda: [user.to_dict() for user in self._by_id.values()])
+        except Exception:
+            # Данные в памяти могли разойтись с диском - перечитаем все при следующем обращении
+            self._signature = None
+            raise
+        self._set_signature(self.storage.signature())
@@ -0,0 +1,131 @@
+import re
+import threading
+from bisect import bisect_left, insort
+
+_WORD_RE = re.compile(r'\w+')
+
+# Поля пользователя, по которым работает поиск
+SEARCH_FIELDS = ('name', 'email', 'city', 'phone')
+
+
+# Приведение к одному регистру; ё и е для поиска не различаем
+def normalize(text):
+    return (text or '').casefold().replace('ё', 'е')
+
+
+def tokenize(text):
+    return _WORD_RE.findall(normalize(text))
+
+
+def user_tokens(user):
+    tokens = set()
+    for field in SEARCH_FIELDS:
+        tokens.update(tokenize(user.get(field)))
+
+    email = normalize(user.get('email')).strip()
+    if email:
+        tokens.add(email)
+
+    # Телефон ищем по цифрам подряд: "+7 (999) 123-45-67" -> 79991234567 и 9991234567
+    digits = re.sub(r'\D', '', user.get('phone') or '')
+    if digits:
+        tokens.add(digits)
+        if len(digits) == 11 and digits[0] in '78':
+            tokens.add(digits[1:])
+    return tokens
+
+
+# Сколько накопленных изменений вливать в отсортированный список по одному
+# (insort), а не пересортировкой всех токенов
+MERGE_INSORT_LIMIT = 64
+
+
+# Инвертированный индекс токен -> id пользователей и префиксный индекс по токенам.
+# Префиксы ищутся в отсортированном списке токенов через bisect: все токены
+# с общим префиксом лежат в нем подряд (то же, что поддерево в trie,
+# но без словаря на каждую букву). Обновляется инкрементально через
+# подписку на репозиторий (reset/add/remove). Новые и удаленные токены
+# копятся в множествах и вливаются в список при следующем поиске: построение
+# индекса на N пользователей - одна сортировка, а не N вставок в список
+class SearchIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._postings = {}
+            self._tokens = []
+            # Токены, которых еще нет в _tokens, и токены, которые из него надо убрать
+            self._pending = set()
+            self._stale = set()
+            self._user_tokens = {}
+
+    def add(self, user):
+        tokens = user_tokens(user)
+        with self._lock:
+            self._user_tokens[user['id']] = tokens
+            for token in tokens:
+                ids = self._postings.get(token)
+                if ids is None:
+                    ids = self._postings[token] = set()
+                    if token in self._stale:
+                        self._stale.discard(token)
+                    else:
+                        self._pending.add(token)
+                ids.add(user['id'])
+
+    def remove(self, user):
+        with self._lock:
+            tokens = self._user_tokens.pop(user['id'], ())
+            for token in tokens:
+                ids = self._postings.get(token)
+                if ids is None:
+                    continue
+                ids.discard(user['id'])
+                if not ids:
+                    del self._postings[token]
+                    if token in self._pending:
+                        self._pending.discard(token)
+                    else:
+                        self._stale.add(token)
+
+    def _merge(self):
+        if len(self._pending) + len(self._stale) > MERGE_INSORT_LIMIT:
+            self._tokens = sorted(self._postings)
+        else:
+            for token in self._pending:
+                insort(self._tokens, token)
+            for token in self._stale:
+                position = bisect_left(self._tokens, token)
+                if position < len(self._tokens) and self._tokens[position] == token:
+                    del self._tokens[position]
+        self._pending.clear()
+        self._stale.clear()
+
+    def _prefix_ids(self, prefix):
+        ids = set()
+        position = bisect_left(self._tokens, prefix)
+        while position < len(self._tokens) and self._tokens[position].startswith(prefix):
+            ids |= self._postings[self._tokens[position]]
+            position += 1
+        return ids
+
+    # id пользователей, у которых каждое слово запроса является началом
+    # какого-нибудь слова в имени, email, городе или телефоне
+    def search(self, query):
+        terms = tokenize(query)
+        if not terms:
+            return set()
+        # Сначала самые длинные слова - у них обычно меньше совпадений
+        terms.sort(key=len, reverse=True)
+        with self._lock:
+            if self._pending or self._stale:
+                self._merge()
+            result = None
+            for term in terms:
+                ids = self._prefix_ids(term)
+                result = ids if result is None else result & ids
+                if not result:
+                    break
+        return result
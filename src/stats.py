@@ -0,0 +1,118 @@
+import threading
+from collections import Counter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Ширина корзины гистограммы возрастов по умолчанию
+AGE_BUCKET = 10
+
+
+def _city_key(city):
+    return (city or '').strip().casefold()
+
+
+def _signup_day(user):
+    created_at = user.get('created_at')
+    return created_at[:10] if created_at else None
+
+
+# Агрегаты по пользователям: сколько в каждом городе, сколько каждого
+# возраста, сколько зарегистрировалось в каждый день. Обновляются
+# инкрементально через подписку на репозиторий (reset/add/remove),
+# поэтому запрос статистики не проходит по всем пользователям
+class UserStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._total = 0
+            self._cities = Counter()
+            # Город пишем так, как его ввели первым (без учета регистра это один город)
+            self._city_names = {}
+            self._ages = Counter()
+            self._days = Counter()
+
+    def add(self, user):
+        with self._lock:
+            self._change(user, 1)
+
+    def remove(self, user):
+        with self._lock:
+            self._change(user, -1)
+
+    def _change(self, user, delta):
+        self._total += delta
+        key = _city_key(user.get('city'))
+        self._cities[key] += delta
+        if self._cities[key] <= 0:
+            del self._cities[key]
+            self._city_names.pop(key, None)
+        else:
+            self._city_names.setdefault(key, (user.get('city') or '').strip())
+        age = user.get('age')
+        if isinstance(age, int):
+            self._ages[age] += delta
+            if self._ages[age] <= 0:
+                del self._ages[age]
+        day = _signup_day(user)
+        if day:
+            self._days[day] += delta
+            if self._days[day] <= 0:
+                del self._days[day]
+
+    def snapshot(self, age_bucket=AGE_BUCKET):
+        with self._lock:
+            cities = {self._city_names[key]: count for key, count in self._cities.items()}
+            return build_report(self._total, cities, dict(self._ages), dict(self._days), age_bucket)
+
+
+# Отчет из готовых счетчиков: {город: n}, {возраст: n}, {день: n}
+def build_report(total, cities, ages, days, age_bucket=AGE_BUCKET):
+    age_count = sum(ages.values())
+    histogram = Counter()
+    for age, count in ages.items():
+        histogram[age // age_bucket * age_bucket] += count
+    return {
+        "total": total,
+        "cities": [{"city": city, "count": count}
+                   for city, count in sorted(cities.items(), key=lambda item: (-item[1], item[0]))],
+        "age": {
+            "count": age_count,
+            "min": min(ages) if ages else None,
+            "max": max(ages) if ages else None,
+            "mean": round(sum(age * count for age, count in ages.items()) / age_count, 2) if age_count else None,
+            "histogram": [{"from": start, "to": start + age_bucket - 1, "count": histogram[start]}
+                          for start in sorted(histogram)],
+        },
+        "signups_per_day": [{"date": day, "count": days[day]} for day in sorted(days)],
+    }
+
+
+# Полный пересчет по списку пользователей (для сверки и ?recompute=1).
+# С NumPy считает по колонкам (массив возрастов, дней, городов) векторно
+def compute_stats(users, age_bucket=AGE_BUCKET):
+    users = list(users)
+    city_names = {}
+    for user in users:
+        city_names.setdefault(_city_key(user.get('city')), (user.get('city') or '').strip())
+    city_keys = [_city_key(user.get('city')) for user in users]
+    ages = [user.get('age') for user in users if isinstance(user.get('age'), int)]
+    days = [day for day in (_signup_day(user) for user in users) if day]
+
+    if numpy is not None and users:
+        def counts(column):
+            values, totals = numpy.unique(numpy.asarray(column), return_counts=True)
+            return {value.item(): int(total) for value, total in zip(values, totals)}
+        city_counts = counts(city_keys)
+        age_counts = counts(numpy.asarray(ages, dtype=numpy.int64)) if ages else {}
+        day_counts = counts(days) if days else {}
+    else:
+        city_counts, age_counts, day_counts = Counter(city_keys), Counter(ages), Counter(days)
+
+    cities = {city_names[key]: count for key, count in city_counts.items()}
+    return build_report(len(users), cities, dict(age_counts), dict(day_counts), age_bucket)
@@ -0,0 +1,387 @@
+import os
+import sqlite3
+import stat
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: блокировка работает только между потоками одного процесса
+    fcntl = None
+
+from src import jsoncodec
+from src.repository import DuplicateEmailError
+
+
+# Отпечаток файла на диске: меняется при любой перезаписи или замене файла
+def file_signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+# Атомарная запись JSON: пишем во временный файл рядом, делаем fsync
+# и подменяем исходный файл через rename. Читатель видит либо старую,
+# либо новую версию файла целиком, но никогда не половину.
+# По умолчанию компактно; indent=2 - для файлов, которые читает человек
+def write_json_atomic(path, data, indent=None):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        try:
+            try:
+                os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+            except FileNotFoundError:
+                os.chmod(tmp_path, 0o644)
+            with open(fd, 'wb', closefd=False) as f:
+                f.write(jsoncodec.dumpb(data, indent=indent))
+                f.flush()
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    _fsync_directory(directory)
+
+
+# После rename нужно сбросить на диск и саму запись в каталоге
+def _fsync_directory(directory):
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# Межпроцессная блокировка через flock на отдельном файле *.lock.
+# Повторный вход из того же потока разрешен (RLock + счетчик)
+class FileLock:
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+            except BaseException:
+                self._thread_lock.release()
+                raise
+            self._fd = fd
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+
+# Хранилище пользователей в одном JSON файле (users.json).
+# Любое изменение переписывает файл целиком
+class JsonFileStorage:
+    def __init__(self, path, load, save):
+        self.path = path
+        self._load = load
+        self._save = save
+        self._lock = FileLock(path + '.lock')
+
+    # Блокировка на время цикла чтение-изменение-запись
+    def lock(self):
+        return self._lock
+
+    def signature(self):
+        return file_signature(self.path)
+
+    def load(self):
+        return self._load()
+
+    def save(self, users):
+        self._save(users)
+
+    # changes - список пар (операция, пользователь), snapshot - функция,
+    # возвращающая текущий полный список пользователей
+    def commit(self, changes, snapshot):
+        self.save(snapshot())
+
+
+# Хранилище с журналом: каждое изменение дописывается одной JSON-строкой
+# в users.json.log, а снимок users.json периодически пересобирается (compaction).
+# При запуске состояние = снимок + проигрывание журнала. Записи, которые
+# дописали другие процессы, дочитываются с места, где закончилось прошлое чтение
+class JournalStorage:
+    def __init__(self, path, log_path=None, compact_every=1000):
+        self.path = path
+        self.log_path = log_path or path + '.log'
+        self.compact_every = compact_every
+        self._log_entries = 0
+        # Сколько байт журнала уже проиграно и при каком снимке
+        self._offset = 0
+        self._snapshot_signature = None
+        self._lock = FileLock(path + '.lock')
+
+    def lock(self):
+        return self._lock
+
+    def signature(self):
+        log_signature = file_signature(self.log_path)
+        snapshot_signature = file_signature(self.path)
+        if log_signature is None and snapshot_signature is None:
+            return None
+        return snapshot_signature, log_signature
+
+    def load(self):
+        # Под блокировкой, чтобы не прочитать снимок и журнал посреди compaction
+        with self._lock:
+            return self._load()
+
+    def _load(self):
+        users = {}
+        self._snapshot_signature = file_signature(self.path)
+        try:
+            with open(self.path, 'rb') as f:
+                for user in jsoncodec.load(f):
+                    users[user['id']] = user
+        except FileNotFoundError:
+            pass
+
+        self._log_entries = 0
+        self._offset = 0
+        for record in self._read_log():
+            self._replay(users, record)
+        return list(users.values())
+
+    # Записи журнала начиная с self._offset; self._offset сдвигается за последнюю
+    # целую строку. Недописанный хвост после падения процесса обрезается,
+    # иначе следующая запись приклеилась бы к нему и потерялась при чтении
+    def _read_log(self):
+        records = []
+        try:
+            with open(self.log_path, 'rb') as f:
+                f.seek(self._offset)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        records.append(jsoncodec.loads(line))
+                    except ValueError:
+                        # Испорченная строка посреди журнала (старые версии) - пропускаем
+                        pass
+                    self._offset += len(line)
+                    self._log_entries += 1
+                torn = f.tell() > self._offset
+        except FileNotFoundError:
+            return records
+        if torn:
+            os.truncate(self.log_path, self._offset)
+        return records
+
+    # Изменения после прошлого чтения: (изменившиеся пользователи, id удаленных)
+    # или None, если журнал сжат или подменен - тогда нужно перечитать все
+    def changes_since(self, signature):
+        with self._lock:
+            log_signature = file_signature(self.log_path)
+            if (file_signature(self.path) != self._snapshot_signature or log_signature is None
+                    or log_signature[1] < self._offset):
+                return None
+            upserts = {}
+            deleted_ids = set()
+            for record in self._read_log():
+                if record['op'] == 'delete':
+                    upserts.pop(record['id'], None)
+                    deleted_ids.add(record['id'])
+                else:
+                    upserts[record['user']['id']] = record['user']
+                    deleted_ids.discard(record['user']['id'])
+            return list(upserts.values()), list(deleted_ids)
+
+    @staticmethod
+    def _replay(users, record):
+        if record['op'] == 'delete':
+            users.pop(record['id'], None)
+        else:
+            users[record['user']['id']] = record['user']
+
+    def save(self, users):
+        self.compact(users)
+
+    def commit(self, changes, snapshot):
+        lines = []
+        for op, user in changes:
+            if op == 'delete':
+                record = {"op": op, "id": user['id']}
+            else:
+                record = {"op": op, "user": user}
+            lines.append(jsoncodec.dumpb(record) + b'\n')
+
+        data = b''.join(lines)
+        with open(self.log_path, 'ab') as f:
+            start = f.seek(0, os.SEEK_END)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._log_entries += len(lines)
+        # Свои записи уже в памяти - при следующем чтении их не проигрываем
+        if start == self._offset:
+            self._offset += len(data)
+
+        if self._log_entries >= self.compact_every:
+            self.compact(snapshot())
+
+    # Записываем новый снимок и очищаем журнал
+    def compact(self, users):
+        with self._lock:
+            write_json_atomic(self.path, users)
+            # Журнал очищаем только после того, как снимок надежно на диске
+            with open(self.log_path, 'wb'):
+                pass
+            self._log_entries = 0
+            self._offset = 0
+            self._snapshot_signature = file_signature(self.path)
+
+
+USER_COLUMNS = ('id', 'name', 'email', 'age', 'phone', 'city', 'created_at', 'updated_at')
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    age INTEGER,
+    phone TEXT,
+    city TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    rev INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS users_email ON users (lower(email));
+CREATE INDEX IF NOT EXISTS users_rev ON users (rev);
+CREATE TABLE IF NOT EXISTS deleted_users (
+    id INTEGER PRIMARY KEY,
+    rev INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deleted_users_rev ON deleted_users (rev);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('rev', 0);
+"""
+
+
+def _row_to_user(row):
+    return {column: row[column] for column in USER_COLUMNS if row[column] is not None}
+
+
+# Хранилище в SQLite (WAL). Каждое изменение - точечный INSERT/UPDATE/DELETE
+# по первичному ключу, уникальность email гарантирует индекс по lower(email).
+# Номер ревизии в meta растет с каждой транзакцией, и другие процессы
+# забирают только строки с rev больше уже виденного
+class SqliteStorage:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._lock = FileLock(path + '.lock')
+        with self._connection() as conn:
+            conn.executescript(SQLITE_SCHEMA)
+
+    # Одно соединение на поток: sqlite3 не разрешает делить его между потоками.
+    # После fork (воркеры gunicorn с preload) соединение родителя не используем
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def lock(self):
+        return self._lock
+
+    def signature(self):
+        row = self._connection().execute("SELECT value FROM meta WHERE key = 'rev'").fetchone()
+        return row[0]
+
+    def load(self):
+        rows = self._connection().execute('SELECT * FROM users ORDER BY id')
+        return [_row_to_user(row) for row in rows]
+
+    def changes_since(self, rev):
+        conn = self._connection()
+        upserts = [_row_to_user(row) for row in
+                   conn.execute('SELECT * FROM users WHERE rev > ? ORDER BY id', (rev,))]
+        deleted_ids = [row[0] for row in
+                       conn.execute('SELECT id FROM deleted_users WHERE rev > ?', (rev,))]
+        return upserts, deleted_ids
+
+    def commit(self, changes, snapshot):
+        conn = self._connection()
+        try:
+            with conn:
+                rev = self._next_rev(conn)
+                for op, user in changes:
+                    if op == 'delete':
+                        conn.execute('DELETE FROM users WHERE id = ?', (user['id'],))
+                        conn.execute('INSERT OR REPLACE INTO deleted_users (id, rev) VALUES (?, ?)',
+                                     (user['id'], rev))
+                    else:
+                        self._upsert(conn, user, rev)
+        except sqlite3.IntegrityError as e:
+            raise DuplicateEmailError(str(e)) from e
+
+    # Полная перезапись таблицы (используется при миграции из users.json)
+    def save(self, users):
+        conn = self._connection()
+        with conn:
+            rev = self._next_rev(conn)
+            conn.execute('INSERT OR REPLACE INTO deleted_users (id, rev) SELECT id, ? FROM users', (rev,))
+            conn.execute('DELETE FROM users')
+            for user in users:
+                self._upsert(conn, user, rev)
+
+    @staticmethod
+    def _next_rev(conn):
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'rev'")
+        return conn.execute("SELECT value FROM meta WHERE key = 'rev'").fetchone()[0]
+
+    @staticmethod
+    def _upsert(conn, user, rev):
+        values = [user.get(column) for column in USER_COLUMNS]
+        conn.execute(
+            'INSERT INTO users ({columns}, rev) VALUES ({marks}, ?) '
+            'ON CONFLICT (id) DO UPDATE SET {updates}, rev = excluded.rev'.format(
+                columns=', '.join(USER_COLUMNS),
+                marks=', '.join('?' * len(USER_COLUMNS)),
+                updates=', '.join(f'{c} = excluded.{c}' for c in USER_COLUMNS[1:])),
+            values + [rev])
+        conn.execute('DELETE FROM deleted_users WHERE id = ?', (user['id'],))
+
+
+# Разовый перенос users.json в SQLite
+def migrate_json_to_sqlite(json_path, db_path):
+    with open(json_path, 'rb') as f:
+        users = jsoncodec.load(f)
+    storage = SqliteStorage(db_path)
+    with storage.lock():
+        storage.save(users)
+    return len(users)
@@ -0,0 +1,40 @@
+from src import jsoncodec
+
+# Сколько пользователей кодируем за один кусок ответа
+CHUNK_SIZE = 500
+
+
+def _dumps(item, indent=None):
+    return jsoncodec.dumps(item, indent=indent)
+
+
+# JSON массив по частям: "[", элементы через запятую, "]".
+# В памяти одновременно только один кусок из chunk_size элементов
+def iter_json_array(items, chunk_size=None, indent=None):
+    chunk_size = chunk_size or CHUNK_SIZE
+    separator = ',\n' if indent else ','
+    yield '[\n' if indent else '['
+    chunk = []
+    first = True
+    for item in items:
+        chunk.append(_dumps(item, indent))
+        if len(chunk) >= chunk_size:
+            yield ('' if first else separator) + separator.join(chunk)
+            first = False
+            chunk = []
+    if chunk:
+        yield ('' if first else separator) + separator.join(chunk)
+    yield '\n]\n' if indent else ']'
+
+
+# NDJSON: по одному JSON объекту на строку
+def iter_ndjson(items, chunk_size=None):
+    chunk_size = chunk_size or CHUNK_SIZE
+    chunk = []
+    for item in items:
+        chunk.append(_dumps(item) + '\n')
+        if len(chunk) >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# Нагрузочные замеры CRUD эндпоинтов пользователей.
+#
+#   python run_tests.py --type bench                      # 1k/10k/50k пользователей
+#   python run_tests.py --type bench --sizes 1000,10000 --requests 100
+#   python run_tests.py --type bench --sizes 100000,1000000   # большие объемы - вручную
+#   python run_tests.py --type bench --save-baseline      # записать новые базовые значения
+#
+# Для каждого размера users.json заполняется сгенерированными пользователями,
+# затем каждый сценарий прогоняется через Flask test client (последовательно)
+# и через локальный HTTP сервер с несколькими параллельными клиентами.
+# Результаты сравниваются с baselines.json: падение req/s или рост p95
+# больше допуска считается регрессией (код возврата 1). Базовые значения
+# в репозитории сняты на машине разработчика - на другом железе сначала
+# перезапишите их через --save-baseline и сравнивайте с ними
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlencode
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+BASELINES_FILE = Path(__file__).resolve().parent / 'baselines.json'
+DEFAULT_SIZES = (1000, 10000, 50000)
+
+CITIES = ('Москва', 'Санкт-Петербург', 'Казань', 'Новосибирск', 'Екатеринбург', 'Тверь', 'Самара')
+FIRST_NAMES = ('Александр', 'Мария', 'Иван', 'Анна', 'Дмитрий', 'Елена', 'Сергей', 'Ольга')
+LAST_NAMES = ('Петров', 'Иванова', 'Сидоров', 'Смирнова', 'Кузнецов', 'Попова', 'Волков')
+
+
+def generate_users(count):
+    rng = random.Random(count)
+    return [{
+        "id": i,
+        "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "email": f"user{i}@example.com",
+        "age": rng.randint(18, 80),
+        "phone": f"+7 (9{i % 100:02d}) {i % 1000:03d}-{i % 100:02d}-{(i // 100) % 100:02d}",
+        "city": rng.choice(CITIES),
+        "created_at": "2024-01-01 12:00:00",
+    } for i in range(1, count + 1)]
+
+
+# Сценарий: имя и функция, возвращающая (метод, путь, тело формы или JSON)
+def scenarios(size):
+    counter = iter(range(10 ** 9))
+
+    def add_user():
+        n = next(counter)
+        return 'POST', '/api/users/add', {'json': {"name": f"Бенчмарк {n}", "email": f"bench{n}@example.com",
+                                                    "age": 30, "city": "Москва"}}
+
+    def edit_user():
+        user_id = random.randint(1, size)
+        return 'POST', f'/users/edit/{user_id}', {'data': {"name": f"Пользователь {user_id}",
+                                                          "email": f"user{user_id}@example.com",
+                                                          "age": str(random.randint(18, 80)),
+                                                          "phone": "", "city": random.choice(CITIES)}}
+
+    return [
+        ('GET /users', lambda: ('GET', '/users?' + urlencode({'page': random.randint(1, 20)}), {})),
+        ('GET /api/users', lambda: ('GET', '/api/users', {})),
+        ('GET /api/users/<id>', lambda: ('GET', f'/api/users/{random.randint(1, size)}', {})),
+        ('POST /api/users/add', add_user),
+        ('POST /users/edit/<id>', edit_user),
+    ]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    position = min(int(q * len(values)), len(values) - 1)
+    return values[position]
+
+
+def summarize(latencies, elapsed):
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+# Последовательные запросы через test client: время обработчиков без сети
+def run_test_client(app, make_request, requests, duration):
+    # Без cookies: flash сообщения после редактирования не копятся в сессии
+    client = app.test_client(use_cookies=False)
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < requests and time.perf_counter() - started < duration:
+        method, path, body = make_request()
+        begin = time.perf_counter()
+        response = client.open(path, method=method, **body)
+        response.close()
+        latencies.append(time.perf_counter() - begin)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{method} {path} -> {response.status_code}')
+    return summarize(latencies, time.perf_counter() - started)
+
+
+# Параллельные клиенты с keep-alive соединениями к локальному HTTP серверу
+def run_http(server, make_request, requests, duration, concurrency):
+    host, port = server.server_address[:2]
+    lock = threading.Lock()
+    latencies = []
+    issued = [0]
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        conn = http.client.HTTPConnection(host, port, timeout=60)
+        try:
+            while True:
+                with lock:
+                    if issued[0] >= requests or time.perf_counter() > deadline:
+                        return
+                    issued[0] += 1
+                    method, path, body = make_request()
+                headers = {}
+                payload = None
+                if 'json' in body:
+                    payload = json.dumps(body['json']).encode('utf-8')
+                    headers['Content-Type'] = 'application/json'
+                elif 'data' in body:
+                    payload = urlencode(body['data']).encode('utf-8')
+                    headers['Content-Type'] = 'application/x-www-form-urlencoded'
+                begin = time.perf_counter()
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                elapsed = time.perf_counter() - begin
+                if response.status >= 400:
+                    raise RuntimeError(f'{method} {path} -> {response.status}')
+                with lock:
+                    latencies.append(elapsed)
+        finally:
+            conn.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def seed(app_module, directory, size):
+    from src.storage import write_json_atomic
+
+    path = os.path.join(directory, f'users_{size}.json')
+    write_json_atomic(path, generate_users(size))
+    app_module.USERS_FILE = path
+    app_module.users_repo.open(app_module.create_users_storage())
+
+
+def compare(results, baselines, tolerance):
+    regressions = []
+    for key, result in results.items():
+        baseline = baselines.get(key)
+        if baseline is None:
+            continue
+        if result['rps'] < baseline['rps'] * (1 - tolerance):
+            regressions.append(f"{key}: {result['rps']} req/s (было {baseline['rps']})")
+        if result['p95_ms'] > baseline['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {result['p95_ms']} мс (было {baseline['p95_ms']})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Нагрузочные замеры эндпоинтов пользователей')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='Количество пользователей через запятую')
+    parser.add_argument('--requests', type=int, default=200, help='Максимум запросов на сценарий')
+    parser.add_argument('--duration', type=float, default=5.0, help='Максимум секунд на сценарий')
+    parser.add_argument('--concurrency', type=int, default=8, help='Параллельных HTTP клиентов')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Допустимое ухудшение относительно baseline (доля)')
+    parser.add_argument('--save-baseline', action='store_true', help='Сохранить результаты как baseline')
+    parser.add_argument('--baselines', default=str(BASELINES_FILE), help='Файл с baseline')
+    args = parser.parse_args(argv)
+
+    from werkzeug.serving import make_server
+
+    # Без строки лога на каждый запрос
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    import app as app_module
+    app = app_module.app
+    original_file, original_storage = app_module.USERS_FILE, app_module.users_repo.storage
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        try:
+            for size in (int(value) for value in args.sizes.split(',')):
+                seed_started = time.perf_counter()
+                seed(app_module, directory, size)
+                print(f'\n{size} пользователей (подготовка {time.perf_counter() - seed_started:.1f} с)')
+                print(f"{'сценарий':28} {'режим':12} {'запросов':>9} {'req/s':>9} "
+                      f"{'p50 мс':>9} {'p95 мс':>9} {'p99 мс':>9}")
+                for name, make_request in scenarios(size):
+                    for mode, run in (('client', lambda: run_test_client(app, make_request, args.requests,
+                                                                         args.duration)),
+                                      ('http', lambda: run_http(server, make_request, args.requests,
+                                                                args.duration, args.concurrency))):
+                        result = run()
+                        results[f'{name}|{size}|{mode}'] = result
+                        print(f"{name:28} {mode:12} {result['requests']:>9} {result['rps']:>9} "
+                              f"{result['p50_ms']:>9} {result['p95_ms']:>9} {result['p99_ms']:>9}")
+        finally:
+            server.shutdown()
+            app_module.USERS_FILE = original_file
+            app_module.users_repo.open(original_storage)
+
+    baselines_path = Path(args.baselines)
+    if args.save_baseline:
+        baselines = json.loads(baselines_path.read_text(encoding='utf-8')) if baselines_path.exists() else {}
+        baselines.update(results)
+        baselines_path.write_text(json.dumps(baselines, ensure_ascii=False, indent=2, sort_keys=True) + '\n',
+                                  encoding='utf-8')
+        print(f'\nBaseline сохранен: {baselines_path}')
+        return 0
+
+    if not baselines_path.exists():
+        print('\nBaseline нет - сравнивать не с чем (запустите с --save-baseline)')
+        return 0
+    regressions = compare(results, json.loads(baselines_path.read_text(encoding='utf-8')), args.tolerance)
+    if regressions:
+        print('\nРЕГРЕССИИ:')
+        for line in regressions:
+            print(f'  {line}')
+        return 1
+    print('\nРегрессий нет')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
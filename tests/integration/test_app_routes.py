@@ -1,5 +1,7 @@
 import pytest
+import gzip
 import json
+import os
 
 @pytest.fixture
 def app():
@@ -51,7 +53,18 @@ def test_contact_page(client):
     assert response.status_code == 200
 
 
-def test_contact_form_submission(client):
+@pytest.fixture
+def contact_messages(app, tmp_path, monkeypatch):
+    from app import contact_queue
+    from src.contact import JsonLinesMessageStore
+    contact_queue.close(timeout=5)
+    monkeypatch.setitem(app.config, 'CONTACT_STORAGE', 'jsonl')
+    monkeypatch.setitem(app.config, 'CONTACT_MESSAGES_FILE', str(tmp_path / 'contact_messages.jsonl'))
+    yield contact_queue, JsonLinesMessageStore(str(tmp_path / 'contact_messages.jsonl'))
+    contact_queue.close(timeout=5)
+
+
+def test_contact_form_submission(client, contact_messages):
     form_data = {
         'name': 'Test User',
         'email': 'test@example.com',
@@ -60,3 +73,77 @@ def test_contact_form_submission(client):
 
     response = client.post('/contact', data=form_data, follow_redirects=True)
     assert response.status_code == 200
+
+
+def test_contact_messages_saved_in_background(client, contact_messages):
+    contact_queue, store = contact_messages
+    for i in range(3):
+        client.post('/contact', data={'name': f'User {i}', 'email': f'user{i}@example.com', 'message': 'Привет'})
+
+    assert contact_queue.flush(timeout=5)
+    saved = store.load()
+    assert [message['name'] for message in saved] == ['User 0', 'User 1', 'User 2']
+    assert saved[0]['message'] == 'Привет' and saved[0]['id'] and saved[0]['created_at']
+
+
+def test_contact_queue_full(client, contact_messages, monkeypatch):
+    import queue
+    contact_queue, store = contact_messages
+
+    def full(message):
+        raise queue.Full
+    monkeypatch.setattr(contact_queue, 'put', full)
+
+    response = client.post('/contact', data={'name': 'User', 'email': 'user@example.com', 'message': 'Hi'})
+    assert response.status_code == 302
+    with client.session_transaction() as session:
+        assert [category for category, _ in session['_flashes']] == ['error']
+
+
+@pytest.fixture
+def assets(app, tmp_path):
+    from app import static_assets
+    old_dir = app.config['ASSETS_DIR']
+    app.config['ASSETS_DIR'] = str(tmp_path / 'dist')
+    static_assets.reset()
+    yield static_assets
+    app.config['ASSETS_DIR'] = old_dir
+    static_assets.reset()
+
+
+def test_static_urls_fingerprinted(client, assets):
+    data = client.get('/').data.decode('utf-8')
+    hashed = assets.manifest['css/style.css']
+
+    assert hashed != 'css/style.css'
+    assert f'/static/{hashed}' in data
+    # Font Awesome отдается своим сервером, а не с CDN
+    assert f"/static/{assets.manifest['vendor/fontawesome/css/all.min.css']}" in data
+    assert 'cdnjs' not in data
+
+
+def test_fingerprinted_static_immutable_and_compressed(client, assets):
+    hashed = assets.manifest['css/style.css']
+
+    response = client.get(f'/static/{hashed}', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/css'
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == 365 * 24 * 3600
+    with open(os.path.join(assets.app.static_folder, 'css', 'style.css'), 'rb') as f:
+        assert gzip.decompress(response.data) == f.read()
+
+    plain = client.get(f'/static/{hashed}', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.data == gzip.decompress(response.data)
+    response.close()
+    plain.close()
+
+
+def test_unhashed_static_still_served(client, assets):
+    response = client.get('/static/css/style.css')
+    assert response.status_code == 200
+    assert not response.cache_control.immutable
+    response.close()
@@ -0,0 +1,121 @@
+import pytest
+import asyncio
+import json
+
+from src.asgi import AsgiAdapter
+
+
+@pytest.fixture
+def app():
+    from app import app as flask_app
+    flask_app.config.update({
+        "TESTING": True,
+        "SECRET_KEY": "test-secret-key",
+    })
+    return flask_app
+
+
+@pytest.fixture
+def mock_users():
+    return [
+        {"id": 1, "name": "Александр Петров", "email": "alex@example.com", "age": 28, "city": "Москва"},
+        {"id": 2, "name": "Мария Иванова", "email": "maria@example.com", "age": 32, "city": "Казань"},
+    ]
+
+
+@pytest.fixture
+def users_file(tmp_path, mock_users, monkeypatch):
+    import app as app_module
+
+    path = tmp_path / 'users.json'
+    path.write_text(json.dumps(mock_users, ensure_ascii=False), encoding='utf-8')
+    monkeypatch.setattr(app_module, 'USERS_FILE', str(path))
+
+    original_storage = app_module.users_repo.storage
+    app_module.users_repo.open(app_module.create_users_storage())
+    yield str(path)
+    app_module.users_repo.open(original_storage)
+
+
+# Выполняет один запрос через ASGI интерфейс; тело приходит кусками с паузами,
+# как от медленного клиента
+async def asgi_request(application, method, path, body=b'', headers=(), delay=0):
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query.encode(),
+        'http_version': '1.1', 'scheme': 'http', 'server': ('testserver', 80),
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers],
+    }
+    chunks = [body[i:i + 8] for i in range(0, len(body), 8)] or [b'']
+    messages = []
+
+    async def receive():
+        await asyncio.sleep(delay)
+        chunk = chunks.pop(0)
+        return {'type': 'http.request', 'body': chunk, 'more_body': bool(chunks)}
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    status = messages[0]['status']
+    headers = {name.decode(): value.decode() for name, value in messages[0]['headers']}
+    return status, headers, b''.join(m.get('body', b'') for m in messages[1:])
+
+
+class TestAsgi:
+
+    def test_get_users(self, app, users_file, mock_users):
+        application = AsgiAdapter(app, max_workers=2)
+        status, headers, body = asyncio.run(asgi_request(application, 'GET', '/api/users'))
+        assert status == 200
+        assert headers['content-type'] == 'application/json'
+        assert json.loads(body) == mock_users
+
+    def test_streaming_response(self, app, users_file, mock_users):
+        application = AsgiAdapter(app, max_workers=2)
+        status, headers, body = asyncio.run(asgi_request(
+            application, 'GET', '/api/users', headers=[('Accept', 'application/x-ndjson')]))
+        assert status == 200
+        assert [json.loads(line) for line in body.splitlines()] == mock_users
+
+    def test_slow_clients_share_few_threads(self, app, users_file):
+        application = AsgiAdapter(app, max_workers=2)
+
+        async def add_users():
+            requests = []
+            for i in range(20):
+                data = json.dumps({"name": f"Клиент {i}", "email": f"client{i}@example.com", "age": 30})
+                requests.append(asgi_request(application, 'POST', '/api/users/add', body=data.encode(),
+                                             headers=[('Content-Type', 'application/json')], delay=0.01))
+            return await asyncio.gather(*requests)
+
+        results = asyncio.run(add_users())
+        assert [status for status, _, _ in results] == [201] * 20
+        status, _, body = asyncio.run(asgi_request(application, 'GET', '/api/users'))
+        assert len(json.loads(body)) == 22
+
+    def test_split_cookie_headers(self):
+        from flask import Flask, jsonify, request
+
+        cookies_app = Flask('cookies')
+        cookies_app.add_url_rule('/cookies', 'cookies', lambda: jsonify(request.cookies))
+        application = AsgiAdapter(cookies_app, max_workers=1)
+        status, _, body = asyncio.run(asgi_request(application, 'GET', '/cookies', headers=[
+            ('Cookie', 'session=abc'), ('Cookie', 'theme=dark; lang=ru')]))
+        assert status == 200
+        assert json.loads(body) == {"session": "abc", "theme": "dark", "lang": "ru"}
+
+    def test_lifespan(self, app):
+        application = AsgiAdapter(app, max_workers=1)
+        incoming = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(application({'type': 'lifespan'}, receive, send))
+        assert sent == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
@@ -45,19 +45,29 @@ def mock_users():
         }
     ]
 
+@pytest.fixture
+def users_file(tmp_path, mock_users, monkeypatch):
+    import app as app_module
+
+    path = tmp_path / 'users.json'
+    path.write_text(json.dumps(mock_users, ensure_ascii=False), encoding='utf-8')
+    monkeypatch.setattr(app_module, 'USERS_FILE', str(path))
+
+    original_storage = app_module.users_repo.storage
+    app_module.users_repo.open(app_module.create_users_storage())
+    yield str(path)
+    app_module.users_repo.open(original_storage)
+
+
 class TestUserRoutes:
 
-    def test_get_users_list(self, client, mock_users):
-        with pytest.MonkeyPatch.context() as mp:
-            mp.setattr('app.load_users', lambda: mock_users)
-            response = client.get('/users')
-            assert response.status_code == 200
+    def test_get_users_list(self, client, users_file):
+        response = client.get('/users')
+        assert response.status_code == 200
 
-    def test_get_user_profile(self, client, mock_users):
-        with pytest.MonkeyPatch.context() as mp:
-            mp.setattr('app.load_users', lambda: mock_users)
-            response = client.get('/user/4')
-            assert response.status_code in [200, 404]
+    def test_get_user_profile(self, client, users_file):
+        response = client.get('/user/4')
+        assert response.status_code in [200, 404]
 
     def test_add_user_form_get(self, client):
         response = client.get('/users/add')
@@ -80,22 +90,18 @@ class TestUserRoutes:
 
 class TestAPIRoutes:
 
-    def test_api_get_users(self, client, mock_users):
-        with pytest.MonkeyPatch.context() as mp:
-            mp.setattr('app.load_users', lambda: mock_users)
-            response = client.get('/api/users')
-            assert response.status_code == 200
-            assert response.content_type == 'application/json'
-            data = json.loads(response.data)
-            assert isinstance(data, list)
-
-    def test_api_get_single_user(self, client, mock_users):
-        with pytest.MonkeyPatch.context() as mp:
-            mp.setattr('app.load_users', lambda: mock_users)
-            response = client.get('/api/users/1')
-            assert response.status_code == 200
-            data = json.loads(response.data)
-            assert 'id' in data
+    def test_api_get_users(self, client, users_file):
+        response = client.get('/api/users')
+        assert response.status_code == 200
+        assert response.content_type == 'application/json'
+        data = json.loads(response.data)
+        assert isinstance(data, list)
+
+    def test_api_get_single_user(self, client, users_file):
+        response = client.get('/api/users/1')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert 'id' in data
 
     def test_api_add_user(self, client, mock_users):
         with patch('app.load_users', return_value=mock_users):
@@ -119,6 +125,53 @@ class TestAPIRoutes:
         data = json.loads(response.data)
         assert 'result' in data
 
+    def test_api_calculate_batch(self, client):
+        response = client.post('/api/calculate', json={'a': [1, 6, 1], 'b': [2, 3, 0], 'operation': 'divide'})
+        assert response.status_code == 200
+        assert json.loads(response.data)['results'] == [{'result': 0.5}, {'result': 2.0},
+                                                        {'error': 'Division by zero'}]
+
+        response = client.post('/api/calculate', json=[{'a': 2, 'b': 3, 'operation': 'multiply'},
+                                                       {'a': 2, 'b': 3}])
+        assert json.loads(response.data)['results'] == [{'result': 6.0}, {'result': 5.0}]
+
+        assert client.post('/api/calculate', json={'a': [1, 2], 'b': [1]}).status_code == 400
+        assert client.post('/api/calculate', json={'a': 1, 'b': 0, 'operation': 'divide'}).status_code == 400
+
+    def test_api_calculate_operation_not_a_string(self, client):
+        # Как и неизвестная операция - результат 0, а не ошибка сервера
+        response = client.post('/api/calculate', json={'a': 1, 'b': 2, 'operation': {'x': 1}})
+        assert response.status_code == 200
+        assert json.loads(response.data) == {'result': 0}
+
+        response = client.post('/api/calculate', json=[{'a': 1, 'b': 2, 'operation': ['add']}])
+        assert json.loads(response.data)['results'] == [{'result': 0}]
+
+        response = client.post('/api/calculate', json={'operation': [['add']]})
+        assert json.loads(response.data)['results'] == [{'result': 0}]
+
+    def test_api_calculate_expression(self, client):
+        response = client.post('/api/calculate', json={'expression': '(a + b) ^ 2 % 7 + sqrt(c)',
+                                                       'variables': {'a': 1, 'b': 2, 'c': 16}})
+        assert response.status_code == 200
+        assert json.loads(response.data) == {'result': 6.0}
+
+        response = client.post('/api/calculate', json={'expression': '1 / x', 'variables': [{'x': 4}, {'x': 0}]})
+        assert json.loads(response.data)['results'] == [{'result': 0.25}, {'error': 'Division by zero'}]
+
+        response = client.post('/api/calculate', json=[{'expression': 'x * 2', 'variables': {'x': 3}},
+                                                       {'a': 1, 'b': 2, 'operation': 'subtract'},
+                                                       {'expression': 'open("x")'}])
+        results = json.loads(response.data)['results']
+        assert results[:2] == [{'result': 6.0}, {'result': -1.0}]
+        assert 'error' in results[2]
+
+        response = client.post('/api/calculate', json={'expression': '__import__("os")'})
+        assert response.status_code == 400
+        assert client.post('/api/calculate', json={'expression': '1 / 0'}).status_code == 400
+        huge = '*'.join(['floor(1e308)'] * 15)
+        assert client.post('/api/calculate', json={'expression': huge}).status_code == 400
+
 
 # Helper function for mocking
 def patch(module, **kwargs):
@@ -0,0 +1,558 @@
+import pytest
+import json
+
+
+@pytest.fixture
+def app():
+    from app import app as flask_app
+    flask_app.config.update({
+        "TESTING": True,
+        "SECRET_KEY": "test-secret-key",
+    })
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def mock_users():
+    return [
+        {
+            "id": 1,
+            "name": "Александр Петров",
+            "email": "alex@example.com",
+            "age": 28,
+            "phone": "+7 (911) 111-11-11",
+            "city": "Москва"
+        },
+        {
+            "id": 2,
+            "name": "Мария Иванова",
+            "email": "maria@example.com",
+            "age": 32,
+            "phone": "+7 (922) 222-22-22",
+            "city": "Казань"
+        },
+        {
+            "id": 3,
+            "name": "Иван Сидоров",
+            "email": "ivan@example.com",
+            "age": 45,
+            "phone": "+7 (933) 333-33-33",
+            "city": "Новосибирск"
+        }
+    ]
+
+
+@pytest.fixture
+def users_file(tmp_path, mock_users, monkeypatch):
+    import app as app_module
+
+    path = tmp_path / 'users.json'
+    path.write_text(json.dumps(mock_users, ensure_ascii=False), encoding='utf-8')
+    monkeypatch.setattr(app_module, 'USERS_FILE', str(path))
+
+    original_storage = app_module.users_repo.storage
+    app_module.users_repo.open(app_module.create_users_storage())
+    yield str(path)
+    app_module.users_repo.open(original_storage)
+
+
+class TestUsersPagination:
+
+    def test_without_params_returns_full_list(self, client, users_file, mock_users):
+        response = client.get('/api/users')
+        assert json.loads(response.data) == mock_users
+        assert 'X-Total-Count' not in response.headers
+
+    def test_page_and_sort(self, client, users_file):
+        response = client.get('/api/users?per_page=2&sort=age&order=desc')
+        assert response.status_code == 200
+        assert [u['id'] for u in json.loads(response.data)] == [3, 2]
+        assert response.headers['X-Total-Count'] == '3'
+        assert 'page=2' in response.headers['Link']
+
+        response = client.get('/api/users?per_page=2&page=2&sort=age&order=desc')
+        assert [u['id'] for u in json.loads(response.data)] == [1]
+        assert 'Link' not in response.headers
+
+    def test_cursor(self, client, users_file):
+        response = client.get('/api/users?after_id=1&limit=1')
+        assert [u['id'] for u in json.loads(response.data)] == [2]
+        assert 'after_id=2' in response.headers['Link']
+
+    def test_filters(self, client, users_file):
+        response = client.get('/api/users?city=казань')
+        assert [u['id'] for u in json.loads(response.data)] == [2]
+
+        response = client.get('/api/users?min_age=30&max_age=40')
+        assert [u['id'] for u in json.loads(response.data)] == [2]
+
+    def test_invalid_params(self, client, users_file):
+        assert client.get('/api/users?sort=password').status_code == 400
+        assert client.get('/api/users?per_page=0').status_code == 400
+        assert client.get('/api/users?min_age=abc').status_code == 400
+
+    def test_users_page_is_paginated(self, client, users_file):
+        response = client.get('/users?per_page=2')
+        data = response.data.decode('utf-8')
+        assert response.status_code == 200
+        assert 'Страница 1 из 2' in data
+        assert 'Иван Сидоров' not in data
+
+        response = client.get('/users?sort=bogus')
+        assert response.status_code == 200
+
+
+class TestUsersStreaming:
+
+    def test_ndjson(self, client, users_file, mock_users):
+        response = client.get('/api/users', headers={'Accept': 'application/x-ndjson'})
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = response.data.decode('utf-8').splitlines()
+        assert [json.loads(line) for line in lines] == mock_users
+
+    def test_chunked_array(self, client, users_file, mock_users):
+        import src.streaming
+
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(src.streaming, 'CHUNK_SIZE', 2)
+            response = client.get('/api/users?stream=1')
+            assert response.is_streamed
+            assert json.loads(response.data) == mock_users
+
+    def test_stream_with_filter(self, client, users_file):
+        response = client.get('/api/users?stream=1&city=Москва')
+        assert [u['id'] for u in json.loads(response.data)] == [1]
+
+    def test_export(self, client, users_file, mock_users):
+        response = client.get('/api/users/export')
+        assert 'attachment' in response.headers['Content-Disposition']
+        assert json.loads(response.data) == mock_users
+
+
+class TestUsersSearch:
+
+    def test_search_endpoint(self, client, users_file):
+        response = client.get('/api/users/search?q=иван')
+        assert response.status_code == 200
+        assert [u['id'] for u in json.loads(response.data)] == [2, 3]
+        assert response.headers['X-Total-Count'] == '2'
+
+        response = client.get('/api/users/search?q=иван&city=Казань')
+        assert [u['id'] for u in json.loads(response.data)] == [2]
+
+    def test_search_requires_query(self, client, users_file):
+        assert client.get('/api/users/search').status_code == 400
+
+    def test_index_follows_changes(self, client, users_file):
+        client.post('/api/users/add', data=json.dumps({
+            'name': 'Иванна Новая', 'email': 'ivanna@example.com', 'age': 20
+        }), content_type='application/json')
+        client.post('/users/delete/3')
+
+        response = client.get('/api/users/search?q=иван')
+        assert [u['id'] for u in json.loads(response.data)] == [2, 4]
+
+    def test_refresh_url_is_not_html_escaped(self, client, users_file):
+        html = client.get('/users?q=сидор&city=Новосибирск&per_page=2').get_data(as_text=True)
+        fetch = next(line for line in html.splitlines() if 'fetch(' in line)
+        assert '&amp;' not in fetch
+        assert '/api/users?' in fetch and 'per_page=2' in fetch
+
+    def test_search_box_on_users_page(self, client, users_file):
+        response = client.get('/users?q=сидор')
+        data = response.data.decode('utf-8')
+        assert 'Иван Сидоров' in data
+        assert 'Мария Иванова' not in data
+
+
+class TestApiAddUserValidation:
+
+    @pytest.mark.parametrize('fields', [{"name": 123}, {"email": ["a@b.c"]}, {"age": "много"}, {"age": True},
+                                        {"age": "²"}, {"age": None},
+                                        {"city": 5}])
+    def test_wrong_types_rejected(self, client, users_file, fields):
+        user = dict({"name": "Новый", "email": "new@example.com", "age": 20}, **fields)
+        response = client.post('/api/users/add', json=user)
+        assert response.status_code == 400
+
+        assert client.get('/api/users/4').status_code == 404
+        with open(users_file, 'r', encoding='utf-8') as f:
+            assert [u['id'] for u in json.load(f)] == [1, 2, 3]
+        # Отклоненный запрос не занял email
+        retry = client.post('/api/users/add', json={"name": "Новый", "email": "new@example.com", "age": 20})
+        assert retry.status_code == 201
+
+
+class TestUsersImport:
+
+    def test_import_json(self, client, users_file):
+        records = [
+            {"name": "Олег", "email": "oleg@example.com", "age": 33, "city": "Тула"},
+            {"name": "", "email": "bad-email", "age": "abc"},
+            {"name": "Копия", "email": "ALEX@example.com", "age": 20},
+            {"name": "Нина", "email": "nina@example.com", "age": "41"},
+            {"name": "Нина 2", "email": "Nina@example.com", "age": 42},
+        ]
+        response = client.post('/api/users/import', data=json.dumps(records),
+                               content_type='application/json')
+        assert response.status_code == 201
+        report = json.loads(response.data)
+        assert report['created'] == 2
+        assert report['ids'] == [4, 5]
+        assert [error['row'] for error in report['errors']] == [2, 3, 5]
+        assert len(report['errors'][0]['errors']) == 3
+
+        users = json.loads(client.get('/api/users').data)
+        assert [u['name'] for u in users[3:]] == ["Олег", "Нина"]
+        assert users[4]['age'] == 41
+
+    def test_import_single_write(self, client, users_file):
+        from unittest.mock import patch
+
+        records = [{"name": f"Пользователь {i}", "email": f"user{i}@example.com", "age": 20}
+                   for i in range(50)]
+        with patch('app.save_users') as mock_save:
+            response = client.post('/api/users/import', data=json.dumps(records),
+                                   content_type='application/json')
+        assert json.loads(response.data)['created'] == 50
+        mock_save.assert_called_once()
+
+    def test_import_ndjson(self, client, users_file):
+        body = '{"name": "Олег", "email": "oleg@example.com", "age": 33}\n' \
+               '{"name": "Нина", "email": "nina@example.com", "age": 41}\n'
+        response = client.post('/api/users/import', data=body.encode('utf-8'),
+                               content_type='application/x-ndjson')
+        assert json.loads(response.data)['created'] == 2
+
+    def test_import_csv_upload(self, client, users_file):
+        import io
+
+        body = 'name;email;age;city\nОлег;oleg@example.com;33;Тула\nНина;nina@example.com;;Тверь\n'
+        response = client.post('/api/users/import',
+                               data={'file': (io.BytesIO(body.encode('utf-8-sig')), 'users.csv')},
+                               content_type='multipart/form-data')
+        report = json.loads(response.data)
+        assert report['created'] == 1
+        assert report['errors'] == [{"row": 2, "errors": ['Возраст должен быть числом']}]
+
+    def test_import_age_zero(self, client, users_file):
+        response = client.post('/api/users/import', json=[{"name": "Младенец", "email": "baby@example.com", "age": 0}])
+        report = json.loads(response.data)
+        assert report['created'] == 1 and report['errors'] == []
+        assert json.loads(client.get(f"/api/users/{report['ids'][0]}").data)['age'] == 0
+
+    def test_superscript_age_is_a_validation_error(self, client, users_file):
+        response = client.post('/api/users/import', json=[{"name": "Степень", "email": "pow@example.com",
+                                                            "age": "²"}])
+        report = json.loads(response.data)
+        assert response.status_code == 400
+        assert report['errors'] == [{"row": 1, "errors": ['Возраст должен быть числом']}]
+
+        response = client.post('/users/add', data={"name": "Степень", "email": "pow@example.com", "age": "²"})
+        assert response.status_code == 200
+        assert 'Возраст должен быть числом' in response.get_data(as_text=True)
+
+    def test_import_rejects_wrong_types(self, client, users_file):
+        response = client.post('/api/users/import', json=[
+            {"name": "Список", "email": ["x@y.ru"], "age": 20},
+            {"name": {"first": "Объект"}, "email": "obj@example.com", "age": 20},
+            {"name": "Флаг", "email": "flag@example.com", "age": True},
+            {"name": "Верный", "email": "ok@example.com", "age": 20},
+        ])
+        report = json.loads(response.data)
+        assert report['created'] == 1
+        assert [error['row'] for error in report['errors']] == [1, 2, 3]
+        assert report['errors'][0]['errors'] == ['Поле email должно быть строкой или числом']
+        emails = [u['email'] for u in json.loads(client.get('/api/users').data)]
+        assert "['x@y.ru']" not in emails and 'ok@example.com' in emails
+
+    def test_import_single_column_csv(self, client, users_file):
+        response = client.post('/api/users/import', data='email\nsolo@example.com\n'.encode('utf-8'),
+                               content_type='text/csv')
+        report = json.loads(response.data)
+        # Файл разобран: отчет по строкам, а не ошибка разбора
+        assert 'error' not in report
+        assert report['total'] == 1 and report['created'] == 0
+        assert [error['row'] for error in report['errors']] == [1]
+        assert 'Имя обязательно для заполнения' in report['errors'][0]['errors']
+
+    def test_import_invalid_body(self, client, users_file):
+        response = client.post('/api/users/import', data='{"name": "x"}',
+                               content_type='application/json')
+        assert response.status_code == 400
+
+
+class TestConditionalRequests:
+
+    def test_list_not_modified(self, client, users_file):
+        response = client.get('/api/users')
+        etag = response.headers['ETag']
+        assert response.headers['Cache-Control'] == 'no-cache'
+        assert 'Last-Modified' in response.headers
+
+        response = client.get('/api/users', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+        assert response.headers['ETag'] == etag
+
+    def test_not_modified_skips_query_and_render(self, client, users_file):
+        from unittest.mock import patch
+
+        etag = client.get('/users').headers['ETag']
+        with patch('app.users_repo.query') as mock_query, patch('app.render_template') as mock_render:
+            response = client.get('/users', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        mock_query.assert_not_called()
+        mock_render.assert_not_called()
+
+    def test_if_modified_since(self, client, users_file):
+        last_modified = client.get('/api/users?per_page=2').headers['Last-Modified']
+        response = client.get('/api/users?per_page=2', headers={'If-Modified-Since': last_modified})
+        assert response.status_code == 304
+
+    def test_representations_have_own_etags(self, client, users_file):
+        json_etag = client.get('/api/users').headers['ETag']
+        ndjson_etag = client.get('/api/users', headers={'Accept': 'application/x-ndjson'}).headers['ETag']
+        page_etag = client.get('/api/users?per_page=2').headers['ETag']
+        assert len({json_etag, ndjson_etag, page_etag}) == 3
+
+    def test_versions_follow_changes(self, client, users_file):
+        list_etag = client.get('/api/users').headers['ETag']
+        user_etag = client.get('/api/users/1').headers['ETag']
+        other_etag = client.get('/api/users/2').headers['ETag']
+
+        client.post('/users/edit/1', data={"name": "Александр Петров", "email": "alex@example.com",
+                                           "age": "29", "phone": "", "city": "Москва"},
+                    follow_redirects=True)
+
+        response = client.get('/api/users', headers={'If-None-Match': list_etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != list_etag
+        response = client.get('/api/users/1', headers={'If-None-Match': user_etag})
+        assert response.status_code == 200
+        assert json.loads(response.data)['age'] == 29
+        # Остальные пользователи не изменились
+        assert client.get('/api/users/2', headers={'If-None-Match': other_etag}).status_code == 304
+
+    def test_missing_user_is_not_cached(self, client, users_file):
+        response = client.get('/api/users/999')
+        assert response.status_code == 404
+        assert 'ETag' not in response.headers
+
+
+class TestUsersPageCache:
+
+    def test_only_changed_cards_are_rendered(self, client, users_file):
+        from app import fragment_cache
+
+        client.get('/users')
+        cards = {user_id: fragment_cache.cards.get(user_id) for user_id in (1, 2, 3)}
+        assert None not in cards.values()
+
+        client.post('/users/edit/2', data={"name": "Мария Смирнова", "email": "maria@example.com",
+                                           "age": "32", "phone": "", "city": "Казань"},
+                    follow_redirects=True)
+        client.post('/users/delete/3', follow_redirects=True)
+
+        assert fragment_cache.cards.get(3) is None
+        response = client.get('/users')
+        assert 'Мария Смирнова' in response.get_data(as_text=True)
+        assert 'Иван Сидоров' not in response.get_data(as_text=True)
+        assert fragment_cache.cards.get(1) is cards[1]
+        assert fragment_cache.cards.get(2) is not cards[2]
+
+    def test_cards_survive_reload(self, client, users_file):
+        import app as app_module
+        from app import fragment_cache
+
+        client.get('/users')
+        cards = {user_id: fragment_cache.cards.get(user_id) for user_id in (1, 2, 3)}
+
+        # Файл изменили в обход приложения: перезагружаются все данные
+        with open(users_file, 'r', encoding='utf-8') as f:
+            users = json.load(f)
+        users[1]['city'] = 'Тверь'
+        with open(users_file, 'w', encoding='utf-8') as f:
+            json.dump(users, f, ensure_ascii=False)
+        app_module.users_repo.open(app_module.create_users_storage())
+
+        assert 'Тверь' in client.get('/users').get_data(as_text=True)
+        assert fragment_cache.cards.get(1) is cards[1]
+        assert fragment_cache.cards.get(3) is cards[3]
+        assert fragment_cache.cards.get(2) is not cards[2]
+
+    def test_page_served_from_cache(self, client, users_file):
+        from unittest.mock import patch
+
+        first = client.get('/users?sort=name').data
+        with patch('app.render_template') as mock_render:
+            assert client.get('/users?sort=name').data == first
+        mock_render.assert_not_called()
+
+    def test_page_embeds_users_json(self, client, users_file, mock_users):
+        html = client.get('/users?sort=age&order=desc').get_data(as_text=True)
+        start = html.index('<script type="application/json" id="users-data">')
+        island = html[html.index('>', start) + 1:html.index('</script>', start)]
+        assert json.loads(island) == mock_users[::-1]
+        assert 'fetch("/api/users?' in html
+        assert "addEventListener('DOMContentLoaded', showEmbeddedUsers)" in html
+
+
+class TestMetricsEndpoint:
+
+    def test_requests_and_operations_are_recorded(self, client, users_file):
+        from app import metrics
+
+        metrics.reset()
+        client.get('/users')
+        client.get('/api/users/1')
+        client.get('/api/users/999')
+        client.post('/api/users/add', json={"name": "Новый", "email": "new@example.com", "age": 20})
+
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        text = response.get_data(as_text=True)
+        assert 'http_requests_total{endpoint="users_list",method="GET",status="200"} 1' in text
+        assert 'http_requests_total{endpoint="api_user",method="GET",status="404"} 1' in text
+        assert 'http_requests_total{endpoint="api_add_user",method="POST",status="201"} 1' in text
+        assert 'app_operation_duration_seconds_count{operation="save_users"} 1' in text
+        assert 'app_operation_duration_seconds_count{operation="render_template:users.html"} 1' in text
+
+
+class TestRequestProfiling:
+
+    def test_signed_token_enables_profiling(self, app, client, users_file, tmp_path, monkeypatch):
+        from app import profile_token_serializer
+
+        monkeypatch.setitem(app.config, 'PROFILE_DIR', str(tmp_path / 'profiles'))
+        monkeypatch.setitem(app.config, 'PROFILE_SECRET', 'profile-secret')
+        token = profile_token_serializer().dumps('profile')
+
+        response = client.get('/api/users', headers={'X-Profile-Token': token})
+        assert response.status_code == 200
+        assert 'X-Profile-Top' in response.headers
+        collapsed = tmp_path / 'profiles' / response.headers['X-Profile-File']
+        assert collapsed.exists()
+        assert 'api_users (app.py:' in collapsed.read_text(encoding='utf-8')
+
+        response = client.get('/api/users?_profile=' + token)
+        assert 'X-Profile-Top' in response.headers
+
+    def test_without_valid_token_not_profiled(self, app, client, users_file, tmp_path, monkeypatch):
+        from itsdangerous import URLSafeTimedSerializer
+
+        monkeypatch.setitem(app.config, 'PROFILE_DIR', str(tmp_path / 'profiles'))
+        monkeypatch.setitem(app.config, 'PROFILE_SECRET', 'profile-secret')
+        # Токен, подписанный secret_key приложения, не подходит
+        app_key_token = URLSafeTimedSerializer(app.secret_key, salt='request-profile').dumps('profile')
+
+        assert 'X-Profile-Top' not in client.get('/api/users').headers
+        assert 'X-Profile-Top' not in client.get('/api/users?_profile=forged').headers
+        assert 'X-Profile-Top' not in client.get('/api/users?_profile=' + app_key_token).headers
+        assert not (tmp_path / 'profiles').exists()
+
+    def test_token_profiling_disabled_without_secret(self, app, client, users_file, tmp_path, monkeypatch):
+        from itsdangerous import URLSafeTimedSerializer
+
+        monkeypatch.setitem(app.config, 'PROFILE_DIR', str(tmp_path / 'profiles'))
+        monkeypatch.setitem(app.config, 'PROFILE_SECRET', None)
+        for key in (app.secret_key, 'your-secret-key-here'):
+            token = URLSafeTimedSerializer(key, salt='request-profile').dumps('profile')
+            assert 'X-Profile-Top' not in client.get('/api/users', headers={'X-Profile-Token': token}).headers
+        assert not (tmp_path / 'profiles').exists()
+
+    def test_profile_all_requests_flag(self, app, client, users_file, tmp_path, monkeypatch):
+        monkeypatch.setitem(app.config, 'PROFILE_DIR', str(tmp_path / 'profiles'))
+        monkeypatch.setitem(app.config, 'PROFILE_REQUESTS', True)
+
+        assert 'X-Profile-Top' in client.get('/users').headers
+        assert len(list((tmp_path / 'profiles').glob('*.prof'))) == 1
+
+
+class TestUsersStats:
+
+    def test_stats_follow_changes(self, client, users_file):
+        report = json.loads(client.get('/api/users/stats').data)
+        assert report['total'] == 3
+        assert {"city": "Казань", "count": 1} in report['cities']
+
+        client.post('/api/users/add', json={"name": "Новый", "email": "new@example.com", "age": 33,
+                                            "city": "Казань"})
+        client.post('/users/delete/1', follow_redirects=True)
+
+        report = json.loads(client.get('/api/users/stats?bucket=20').data)
+        assert report['total'] == 3
+        assert {"city": "Казань", "count": 2} in report['cities']
+        assert report['age']['histogram'] == [{"from": 20, "to": 39, "count": 2},
+                                              {"from": 40, "to": 59, "count": 1}]
+        assert len(report['signups_per_day']) == 1
+        assert json.loads(client.get('/api/users/stats?bucket=20&recompute=1').data) == report
+
+    def test_stats_conditional_and_validation(self, client, users_file):
+        etag = client.get('/api/users/stats').headers['ETag']
+        assert client.get('/api/users/stats', headers={'If-None-Match': etag}).status_code == 304
+        assert client.get('/api/users/stats?bucket=0').status_code == 400
+
+
+class TestResponseCompression:
+
+    def test_json_gzip_cached_per_version(self, app, client, users_file, monkeypatch):
+        import gzip
+        from app import compressor
+        compressor.cache.clear()
+        monkeypatch.setitem(app.config, 'COMPRESS_MIN_SIZE', 0)
+
+        plain = client.get('/api/users')
+        response = client.get('/api/users', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert json.loads(gzip.decompress(response.data)) == json.loads(plain.data)
+        assert response.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+        assert len(compressor.cache) == 1
+
+        # Та же версия данных - сжатое тело из кэша, без повторного сжатия
+        calls = []
+        original = compressor.compress
+        compressor.compress = lambda data, coding: calls.append(coding) or original(data, coding)
+        try:
+            again = client.get('/api/users', headers={'Accept-Encoding': 'gzip'})
+            assert again.data == response.data
+            assert calls == []
+            assert client.post('/api/users/add', json={"name": "Новый", "email": "new@example.com",
+                                                         "age": 20}).status_code == 201
+            client.get('/api/users', headers={'Accept-Encoding': 'gzip'})
+            assert calls == ['gzip']
+        finally:
+            compressor.compress = original
+
+    def test_not_modified_with_compressed_etag(self, app, client, users_file, monkeypatch):
+        monkeypatch.setitem(app.config, 'COMPRESS_MIN_SIZE', 0)
+        etag = client.get('/api/users', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+        assert etag.endswith('-gzip"')
+        response = client.get('/api/users', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+        assert 'Accept-Encoding' in response.headers['Vary']
+
+        # Клиент без сжатия тоже получает Vary в 304
+        etag = client.get('/api/users').headers['ETag']
+        response = client.get('/api/users', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert 'Accept-Encoding' in response.headers['Vary']
+
+    def test_small_and_streamed_responses(self, app, client, users_file):
+        import zlib
+        response = client.get('/api/users/1', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+
+        plain = client.get('/api/users', headers={'Accept': 'application/x-ndjson'})
+        streamed = client.get('/api/users', headers={'Accept': 'application/x-ndjson', 'Accept-Encoding': 'gzip'})
+        assert streamed.headers['Content-Encoding'] == 'gzip'
+        assert zlib.decompress(streamed.data, 31) == plain.data
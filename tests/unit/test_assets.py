@@ -0,0 +1,60 @@
+import gzip
+import json
+import os
+import sys
+
+# Добавляем путь к приложению
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.assets import MANIFEST, build_assets
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+class TestBuildAssets:
+
+    def test_fingerprints_and_compresses(self, tmp_path):
+        static, dist = tmp_path / 'static', tmp_path / 'static' / 'dist'
+        write(static / 'js' / 'app.js', b'console.log(1);')
+        write(static / 'fonts' / 'icons.woff2', b'\x00woff2')
+
+        manifest = build_assets(str(static), str(dist))
+
+        hashed = manifest['js/app.js']
+        assert hashed.startswith('js/app.') and hashed.endswith('.js') and hashed != 'js/app.js'
+        assert (dist / hashed).read_bytes() == b'console.log(1);'
+        assert gzip.decompress((dist / (hashed + '.gz')).read_bytes()) == b'console.log(1);'
+        # woff2 уже сжат
+        assert not (dist / (manifest['fonts/icons.woff2'] + '.gz')).exists()
+        assert json.loads((dist / MANIFEST).read_text(encoding='utf-8')) == manifest
+        # Каталог сборки сам в сборку не попадает
+        assert not any(name.startswith('dist/') for name in manifest)
+
+    def test_hash_changes_with_content(self, tmp_path):
+        static, dist = tmp_path / 'static', tmp_path / 'dist'
+        write(static / 'app.js', b'1')
+        first = build_assets(str(static), str(dist))['app.js']
+        write(static / 'app.js', b'2')
+        second = build_assets(str(static), str(dist))['app.js']
+
+        assert first != second
+
+    def test_css_urls_rewritten(self, tmp_path):
+        static, dist = tmp_path / 'static', tmp_path / 'dist'
+        write(static / 'vendor' / 'webfonts' / 'fa.woff2', b'font')
+        write(static / 'vendor' / 'css' / 'all.css',
+              b'@font-face{src:url(../webfonts/fa.woff2) format("woff2"),'
+              b'url("data:font/woff2;base64,AA") format("woff2")}'
+              b'.x{background:url(missing.png)}')
+
+        manifest = build_assets(str(static), str(dist))
+        css = (dist / manifest['vendor/css/all.css']).read_text(encoding='utf-8')
+
+        font = manifest['vendor/webfonts/fa.woff2']
+        assert f'url(../webfonts/{os.path.basename(font)})' in css
+        assert 'url("data:font/woff2;base64,AA")' in css
+        assert 'url(missing.png)' in css
@@ -0,0 +1,50 @@
+import os
+import sys
+
+# Добавляем путь к приложению
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.cache import FragmentCache, LRUCache
+
+
+class TestLRUCache:
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        assert cache.get('a') == 1
+        cache.set('c', 3)
+
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert len(cache) == 2
+
+
+class TestFragmentCache:
+
+    def test_card_rendered_once_per_version(self):
+        cache = FragmentCache()
+        renders = []
+
+        def render():
+            renders.append(1)
+            return f'card {len(renders)}'
+
+        assert cache.card(1, 'v1', render) == 'card 1'
+        assert cache.card(1, 'v1', render) == 'card 1'
+        assert cache.card(1, 'v2', render) == 'card 2'
+        assert len(renders) == 2
+
+    def test_remove_drops_only_that_card(self):
+        cache = FragmentCache()
+        cache.card(1, 'v1', lambda: 'one')
+        cache.card(2, 'v1', lambda: 'two')
+        cache.pages.set(('version', '/users?'), 'page')
+
+        cache.remove({'id': 1})
+
+        assert cache.cards.get(1) is None
+        assert cache.cards.get(2) == ('v1', 'two')
+        assert len(cache.pages) == 0
@@ -0,0 +1,53 @@
+import pytest
+import os
+import sys
+
+# Добавляем путь к приложению
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src import calculator
+from src.calculator import CalculationError, batch_columns, batch_items, calculate_batch, calculate_one
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        if calculator.numpy is None:
+            pytest.skip('NumPy is not installed')
+    else:
+        monkeypatch.setattr(calculator, 'numpy', None)
+    return request.param
+
+
+class TestCalculator:
+
+    def test_calculate_one(self):
+        assert calculate_one(10, 5, 'subtract') == 5
+        assert calculate_one('1.5', 2, 'multiply') == 3
+        assert calculate_one(1, 2, 'unknown') == 0
+        assert calculate_one(1, 2, {'x': 1}) == 0
+        assert calculate_one(1, 2, ['add']) == 0
+        with pytest.raises(ZeroDivisionError):
+            calculate_one(1, 0, 'divide')
+        with pytest.raises(CalculationError):
+            calculate_one('x', 1, 'add')
+
+    def test_batch_per_element(self, backend):
+        results = calculate_batch([1, 6, 1, 2, 3], [2, 3, 0, 4, 1],
+                                  ['add', 'divide', 'divide', 'multiply', 'power'])
+        assert results == [{"result": 3.0}, {"result": 2.0}, {"error": "Division by zero"},
+                           {"result": 8.0}, {"result": 0}]
+        assert calculate_batch([1, 1], [2, 2], [['add'], {'x': 1}]) == [{"result": 0}, {"result": 0}]
+
+    def test_batch_columns_broadcast(self):
+        assert batch_columns({"a": [1, 2], "b": 10, "operation": "add"}, 100) == ([1, 2], [10, 10], ['add', 'add'])
+        with pytest.raises(CalculationError):
+            batch_columns({"a": [1, 2], "b": [1]}, 100)
+        with pytest.raises(CalculationError):
+            batch_columns({"a": [1, 2, 3]}, 2)
+
+    def test_batch_items(self):
+        assert batch_items([{"a": 1, "b": 2}, {"a": 3, "operation": "divide"}], 10) == \
+            ([1, 3], [2, 0], ['add', 'divide'])
+        with pytest.raises(CalculationError):
+            batch_items([1, 2], 10)
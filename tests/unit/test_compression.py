@@ -0,0 +1,32 @@
+import gzip
+import os
+import sys
+import zlib
+
+# Добавляем путь к приложению
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.compression import CODINGS, _stream
+
+
+class TestStreamCompression:
+
+    def test_gzip_stream_roundtrip(self):
+        closed = []
+
+        def chunks():
+            try:
+                yield '{"id": 1}\n'
+                yield b'{"id": 2}\n'
+            finally:
+                closed.append(True)
+
+        _, compressor = CODINGS['gzip']
+        data = b''.join(_stream(chunks(), compressor(6)))
+
+        assert gzip.decompress(data) == b'{"id": 1}\n{"id": 2}\n'
+        assert closed == [True]
+
+    def test_whole_body_matches_stream_format(self):
+        compress, _ = CODINGS['gzip']
+        assert zlib.decompress(compress(b'x' * 1000, 6), 31) == b'x' * 1000
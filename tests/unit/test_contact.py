@@ -0,0 +1,170 @@
+import pytest
+import os
+import queue
+import sys
+import threading
+import time
+
+# Добавляем путь к приложению
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.contact import JsonLinesMessageStore, MessageQueue, SqliteMessageStore
+
+
+def message(i):
+    return {"id": f"m{i}", "name": f"Имя {i}", "email": f"user{i}@example.com", "message": "Привет",
+            "created_at": "2024-01-01 10:00:00"}
+
+
+@pytest.fixture(params=['jsonl', 'sqlite'])
+def store_factory(request, tmp_path):
+    if request.param == 'sqlite':
+        return lambda: SqliteMessageStore(str(tmp_path / 'messages.db'))
+    return lambda: JsonLinesMessageStore(str(tmp_path / 'messages.jsonl'))
+
+
+class TestMessageQueue:
+
+    def test_messages_written_in_batches(self, store_factory):
+        batches = []
+
+        class RecordingStore:
+            def __init__(self):
+                self.store = store_factory()
+
+            def append_many(self, messages):
+                batches.append(len(messages))
+                self.store.append_many(messages)
+
+            def close(self):
+                self.store.close()
+
+        messages = MessageQueue(RecordingStore, batch_size=10, flush_interval=60)
+        for i in range(25):
+            messages.put(message(i))
+        assert messages.flush(timeout=5)
+        messages.close(timeout=5)
+
+        assert sum(batches) == 25
+        assert max(batches) <= 10
+        assert store_factory().load() == [message(i) for i in range(25)]
+
+    def test_periodic_flush(self, store_factory):
+        messages = MessageQueue(store_factory, flush_interval=0.05)
+        messages.put(message(1))
+        store = store_factory()
+        for _ in range(100):
+            if store.load():
+                break
+            threading.Event().wait(0.02)
+        assert store.load() == [message(1)]
+        messages.close(timeout=5)
+
+    def test_failed_write_retried(self, tmp_path):
+        attempts = []
+        store = JsonLinesMessageStore(str(tmp_path / 'messages.jsonl'))
+
+        class FlakyStore:
+            def append_many(self, messages):
+                attempts.append(len(messages))
+                if len(attempts) == 1:
+                    raise OSError('disk is busy')
+                store.append_many(messages)
+
+            def close(self):
+                pass
+
+        messages = MessageQueue(FlakyStore, flush_interval=0.01)
+        messages.put(message(1))
+        assert messages.flush(timeout=5)
+        messages.close(timeout=5)
+        assert len(attempts) == 2
+        assert store.load() == [message(1)]
+
+    def test_bounded_queue(self, tmp_path):
+        release = threading.Event()
+
+        class SlowStore:
+            def append_many(self, messages):
+                release.wait(5)
+
+            def close(self):
+                pass
+
+        messages = MessageQueue(SlowStore, maxsize=2, batch_size=1, flush_interval=0, put_timeout=0.01)
+        try:
+            with pytest.raises(queue.Full):
+                for i in range(10):
+                    messages.put(message(i))
+        finally:
+            release.set()
+            messages.close(timeout=5)
+
+    def test_close_writes_queued_messages(self, store_factory):
+        messages = MessageQueue(store_factory, batch_size=1000, flush_interval=60)
+        for i in range(5):
+            messages.put(message(i))
+        # Без flush: close() (он же вызывается при выходе) дописывает очередь
+        messages.close(timeout=5)
+        assert store_factory().load() == [message(i) for i in range(5)]
+
+        # После close следующее сообщение снова запускает поток
+        messages.put(message(5))
+        messages.close(timeout=5)
+        assert store_factory().load() == [message(i) for i in range(6)]
+
+    def test_dead_writer_restarted_on_same_queue(self, tmp_path):
+        store = JsonLinesMessageStore(str(tmp_path / 'messages.jsonl'))
+        opened = []
+
+        def store_factory():
+            opened.append(True)
+            if len(opened) == 1:
+                raise OSError('store is unavailable')
+            return store
+
+        messages = MessageQueue(store_factory, flush_interval=0.01)
+        messages.put(message(1))
+        first_thread, first_queue = messages._thread, messages._queue
+        first_thread.join(5)
+        assert not first_thread.is_alive()
+
+        messages.put(message(2))
+        assert messages._thread is not first_thread
+        assert messages._queue is first_queue
+        assert messages.flush(timeout=5)
+        messages.close(timeout=5)
+        assert store.load() == [message(1), message(2)]
+
+    def test_close_does_not_hang_on_full_queue(self):
+        class BrokenStore:
+            def append_many(self, messages):
+                raise OSError('disk is full')
+
+            def close(self):
+                pass
+
+        messages = MessageQueue(BrokenStore, maxsize=2, batch_size=1, flush_interval=0.01, put_timeout=0.01)
+        with pytest.raises(queue.Full):
+            for i in range(10):
+                messages.put(message(i))
+
+        started = time.monotonic()
+        assert messages.flush(timeout=0.2) is False
+        messages.close(timeout=0.2)
+        assert time.monotonic() - started < 2
+        assert messages._thread.is_alive()
+
+    def test_new_worker_after_fork(self, tmp_path, monkeypatch):
+        messages = MessageQueue(lambda: JsonLinesMessageStore(str(tmp_path / 'messages.jsonl')))
+        messages.put(message(1))
+        parent_thread = messages._thread
+
+        pid = os.getpid()
+        monkeypatch.setattr(os, 'getpid', lambda: pid + 1)
+        messages.put(message(2))
+        assert messages._thread is not parent_thread
+        assert messages.flush(timeout=5)
+        messages.close(timeout=5)
+        monkeypatch.undo()
+        messages.close(timeout=5)
@@ -0,0 +1,68 @@
+import pytest
+import math
+import os
+import sys
+
+# Добавляем путь к приложению
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.expressions import ExpressionCompiler, ExpressionError, compile_expression
+
+
+class TestExpressions:
+
+    def test_operators_and_functions(self):
+        assert compile_expression('2 + 3 * (4 - 1)').evaluate() == 11
+        assert compile_expression('2 ^ 10 + 2 ** 2').evaluate() == 1028
+        assert compile_expression('17 % 5 + 17 // 5').evaluate() == 5
+        assert compile_expression('-sqrt(16) + abs(-2)').evaluate() == -2
+        assert compile_expression('round(pi, 2) + max(1, 5, 3)').evaluate() == 8.14
+        assert compile_expression('log(e)').evaluate() == 1
+
+    def test_variables(self):
+        expression = compile_expression('a * x ^ 2 + b')
+        assert expression.variables == {'a', 'x', 'b'}
+        assert expression.evaluate({'a': 2, 'x': 3, 'b': '1'}) == 19
+        with pytest.raises(ExpressionError, match='Unknown variable: b'):
+            expression.evaluate({'a': 1, 'x': 1})
+
+    @pytest.mark.parametrize('source', [
+        '__import__("os").system("true")',
+        'a.__class__',
+        '[1, 2]',
+        'x if y else z',
+        'lambda: 1',
+        'sqrt(x=1)',
+        'sqrt(1, 2)',
+        '"text"',
+        '1 +',
+        '(' * 500 + '1' + ')' * 500,
+    ])
+    def test_rejects_unsafe_or_invalid(self, source):
+        with pytest.raises(ExpressionError):
+            compile_expression(source)
+
+    def test_math_errors(self):
+        with pytest.raises(ZeroDivisionError):
+            compile_expression('1 / (x - 1)').evaluate({'x': 1})
+        with pytest.raises(ExpressionError):
+            compile_expression('sqrt(-1)').evaluate()
+        with pytest.raises(ExpressionError):
+            compile_expression('10 ^ 10 ^ 10').evaluate()
+        assert math.isclose(compile_expression('(-8) ^ 2').evaluate(), 64)
+
+    def test_results_are_bounded_floats(self):
+        assert compile_expression('floor(2.7) + ceil(x)').evaluate({'x': 0.2}) == 3.0
+        assert isinstance(compile_expression('floor(2.7)').evaluate(), float)
+        # Произведение целых из floor росло бы без ограничений
+        with pytest.raises(ExpressionError, match='out of range'):
+            compile_expression('*'.join(['floor(1e308)'] * 15)).evaluate()
+
+    def test_compiled_expressions_cached(self):
+        compiler = ExpressionCompiler(cache_size=2)
+        first = compiler.compile('x + 1')
+        assert compiler.compile('x + 1') is first
+        assert first.evaluate({'x': 1}) == 2 and first.evaluate({'x': 41}) == 42
+        compiler.compile('x + 2')
+        compiler.compile('x + 3')
+        assert compiler.compile('x + 1') is not first
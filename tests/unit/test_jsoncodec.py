@@ -0,0 +1,80 @@
+import pytest
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+# Добавляем путь к приложению
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src import jsoncodec
+
+USERS = [{"id": 1, "name": "Александр Петров", "age": 28, "tags": ["a", "b"]}]
+
+
+@pytest.fixture(params=['fast', 'stdlib'])
+def codec(request, monkeypatch):
+    # Один и тот же результат с orjson и без него
+    if request.param == 'stdlib':
+        monkeypatch.setattr(jsoncodec, 'orjson', None)
+    elif jsoncodec.orjson is None:
+        pytest.skip('orjson не установлен')
+    return jsoncodec
+
+
+class TestJsonCodec:
+
+    def test_compact_utf8(self, codec):
+        data = codec.dumpb(USERS)
+        assert data == json.dumps(USERS, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        assert codec.loads(data) == USERS
+        assert codec.loads(data.decode('utf-8')) == USERS
+
+    def test_pretty(self, codec):
+        assert codec.dumps(USERS, indent=2) == json.dumps(USERS, ensure_ascii=False, indent=2)
+
+    def test_sort_keys(self, codec):
+        assert codec.dumps({"b": 1, "a": 2}, sort_keys=True) == '{"a":2,"b":1}'
+
+    def test_big_integers_fall_back_to_stdlib(self, codec):
+        assert codec.loads(codec.dumpb({"n": 2 ** 70})) == {"n": 2 ** 70}
+
+    def test_invalid_json_is_value_error(self, codec):
+        with pytest.raises(ValueError):
+            codec.loads(b'{"id": 1')
+
+
+class TestJSONProvider:
+
+    def test_jsonify_matches_default_provider(self):
+        from flask import Flask
+        from flask.json.provider import DefaultJSONProvider
+
+        app = Flask(__name__)
+        provider = jsoncodec.JSONProvider(app)
+        data = {"name": "Мария", "when": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc), "id": 7}
+
+        assert json.loads(provider.dumps(data)) == json.loads(DefaultJSONProvider(app).dumps(data))
+        assert provider.dumps(data) == '{"id":7,"name":"Мария","when":"Tue, 02 Jan 2024 03:04:05 GMT"}'
+        assert provider.loads('{"a": [1, 2]}') == {"a": [1, 2]}
+
+    @pytest.mark.skipif(jsoncodec.orjson is None, reason='orjson не установлен')
+    def test_jsonify_and_tojson_use_orjson(self, monkeypatch):
+        from flask import Flask, jsonify, render_template_string
+
+        app = Flask(__name__)
+        app.json = jsoncodec.JSONProvider(app)
+        calls = []
+        original = jsoncodec.orjson.dumps
+
+        def counting_dumps(*args, **kwargs):
+            calls.append(kwargs.get('option'))
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(jsoncodec.orjson, 'dumps', counting_dumps)
+        with app.test_request_context():
+            assert jsonify({"b": 1, "a": "Мария"}).get_data(as_text=True) == '{"a":"Мария","b":1}\n'
+            assert render_template_string('{{ data|tojson }}', data={"a": 1}) == '{"a":1}'
+            app.json.compact = False
+            assert jsonify({"a": [1]}).get_data(as_text=True) == '{\n  "a": [\n    1\n  ]\n}\n'
+        assert len(calls) == 3
@@ -0,0 +1,56 @@
+import os
+import sys
+
+# Добавляем путь к приложению
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.metrics import Histogram, Metrics
+
+
+class TestHistogram:
+
+    def test_quantiles(self):
+        histogram = Histogram(buckets=(0.1, 0.2, 0.5))
+        for value in [0.05] * 50 + [0.15] * 45 + [0.4] * 5:
+            histogram.observe(value)
+
+        assert histogram.count == 100
+        assert histogram.quantile(0.5) == 0.1
+        assert 0.1 < histogram.quantile(0.95) <= 0.2
+        assert 0.2 < histogram.quantile(0.99) <= 0.5
+        assert Histogram().quantile(0.5) is None
+
+    def test_bucket_bounds_are_inclusive(self):
+        histogram = Histogram(buckets=(0.1, 0.2))
+        histogram.observe(0.1)
+        histogram.observe(3)
+        assert list(histogram.cumulative()) == [(0.1, 1), (0.2, 1), (float('inf'), 2)]
+
+
+class TestMetrics:
+
+    def test_prometheus_format(self):
+        metrics = Metrics()
+        metrics.observe_request('api_users', 'GET', 200, 0.003)
+        metrics.observe_request('api_users', 'GET', 200, 0.004)
+        metrics.observe_request('api_users', 'GET', 304, 0.0005)
+        with metrics.timer('load_users'):
+            pass
+
+        text = metrics.render()
+        assert 'http_requests_total{endpoint="api_users",method="GET",status="200"} 2' in text
+        assert 'http_requests_total{endpoint="api_users",method="GET",status="304"} 1' in text
+        assert 'http_request_duration_seconds_bucket{endpoint="api_users",le="+Inf"} 3' in text
+        assert 'http_request_duration_seconds_count{endpoint="api_users"} 3' in text
+        assert 'http_request_duration_seconds_quantile{endpoint="api_users",quantile="0.99"}' in text
+        assert 'app_operation_duration_seconds_count{operation="load_users"} 1' in text
+        assert '# TYPE http_request_duration_seconds histogram' in text
+
+    def test_unknown_methods_share_one_series(self):
+        metrics = Metrics()
+        for method in ('FOO', 'BAR', 'get'):
+            metrics.observe_request('unmatched', method, 405, 0.001)
+
+        text = metrics.render()
+        assert 'http_requests_total{endpoint="unmatched",method="other",status="405"} 3' in text
+        assert 'FOO' not in text and 'BAR' not in text
@@ -0,0 +1,47 @@
+import pytest
+import os
+import sys
+
+# Добавляем путь к приложению
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src import jsoncodec
+from src.models import User
+
+
+class TestUser:
+
+    def test_round_trip(self):
+        data = {"id": 1, "name": "Александр Петров", "email": "alex@example.com", "age": 28,
+                "city": "Москва", "nickname": "alex"}
+        user = User.from_dict(data)
+
+        assert user.to_dict() == data
+        assert user == data
+        assert not hasattr(user, '__dict__')
+
+    def test_dict_like_access(self):
+        user = User.from_dict({"id": 1, "name": "Мария", "age": 32})
+
+        assert user['name'] == "Мария"
+        assert user.get('city') is None
+        assert user.get('city', '') == ''
+        assert 'age' in user
+        assert 'phone' not in user
+        with pytest.raises(KeyError):
+            user['phone']
+
+    def test_update(self):
+        user = User.from_dict({"id": 1, "name": "Мария", "city": "Казань"})
+        user.update({"city": "Тверь", "nickname": "masha"})
+
+        assert user.to_dict() == {"id": 1, "name": "Мария", "city": "Тверь", "nickname": "masha"}
+
+    def test_repeated_strings_are_shared(self):
+        first = User.from_dict({"id": 1, "city": "".join(["Моск", "ва"])})
+        second = User.from_dict({"id": 2, "city": "".join(["Мос", "ква"])})
+        assert first.city is second.city
+
+    def test_json_boundary(self):
+        user = User.from_dict({"id": 1, "name": "Мария"})
+        assert jsoncodec.loads(jsoncodec.dumps([user])) == [{"id": 1, "name": "Мария"}]
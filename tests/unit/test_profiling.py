@@ -0,0 +1,43 @@
+import cProfile
+import json
+import os
+import pstats
+import sys
+
+# Добавляем путь к приложению
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.profiling import collapsed_stacks, top_functions
+
+
+def parse_users():
+    return json.loads(json.dumps([{"id": i, "name": f"user {i}"} for i in range(20000)]))
+
+
+def handler():
+    return len(parse_users())
+
+
+class TestProfiling:
+
+    def test_collapsed_stacks(self):
+        profiler = cProfile.Profile()
+        profiler.runcall(handler)
+        stats = pstats.Stats(profiler)
+
+        lines = collapsed_stacks(stats)
+        assert lines
+        for line in lines:
+            stack, value = line.rsplit(' ', 1)
+            assert int(value) > 0
+        # Стек идет от корня: handler -> parse_users -> ...
+        assert any(line.startswith('handler (test_profiling.py:') and ';parse_users (' in line
+                   for line in lines)
+
+    def test_top_functions(self):
+        profiler = cProfile.Profile()
+        profiler.runcall(handler)
+        top = top_functions(pstats.Stats(profiler), limit=3)
+
+        assert len(top) == 3
+        assert top[0][1] >= top[1][1] >= top[2][1]
@@ -0,0 +1,212 @@
+import pytest
+import json
+import os
+import sys
+
+# Добавляем путь к приложению
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.repository import DuplicateEmailError, UserRepository, _sort_key
+from src.storage import JsonFileStorage
+
+
+@pytest.fixture
+def mock_users():
+    return [
+        {
+            "id": 1,
+            "name": "Александр Петров",
+            "email": "alex@example.com",
+            "age": 28,
+            "phone": "+7 (911) 111-11-11",
+            "city": "Москва"
+        },
+        {
+            "id": 2,
+            "name": "Мария Иванова",
+            "email": "maria@example.com",
+            "age": 32,
+            "phone": "+7 (922) 222-22-22",
+            "city": "Казань"
+        }
+    ]
+
+
+@pytest.fixture
+def users_path(tmp_path, mock_users):
+    path = tmp_path / 'users.json'
+    path.write_text(json.dumps(mock_users, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+class CountingStorage(JsonFileStorage):
+    def __init__(self, path):
+        super().__init__(path, load=self._read, save=self._write)
+        self.loads = 0
+
+    def _read(self):
+        self.loads += 1
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write(self, users):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(users, f, ensure_ascii=False)
+
+
+class TestUserRepository:
+
+    def test_reads_file_only_once(self, users_path):
+        storage = CountingStorage(users_path)
+        repo = UserRepository(storage)
+
+        for _ in range(10):
+            assert len(repo.all()) == 2
+            assert repo.get(1)['name'] == "Александр Петров"
+
+        assert storage.loads == 1
+
+    def test_reloads_when_file_changes(self, users_path, mock_users):
+        storage = CountingStorage(users_path)
+        repo = UserRepository(storage)
+
+        # Файл переписан другим процессом
+        with open(users_path, 'w', encoding='utf-8') as f:
+            json.dump(mock_users[:1], f, ensure_ascii=False, indent=4)
+
+        assert repo.count() == 1
+        assert storage.loads == 2
+
+    def test_own_writes_do_not_trigger_reload(self, users_path):
+        storage = CountingStorage(users_path)
+        repo = UserRepository(storage)
+
+        repo.add({"name": "Новый", "email": "new@example.com", "age": 20})
+        repo.update(1, {"city": "Тверь"})
+        repo.delete(2)
+
+        assert [u['id'] for u in repo.all()] == [1, 3]
+        assert repo.get(1)['city'] == "Тверь"
+        assert 'updated_at' in repo.get(1)
+        assert storage.loads == 1
+
+        with open(users_path, 'r', encoding='utf-8') as f:
+            assert [u['id'] for u in json.load(f)] == [1, 3]
+
+    def test_email_index_is_case_insensitive(self, users_path):
+        repo = UserRepository(CountingStorage(users_path))
+
+        assert repo.email_taken("ALEX@example.com")
+        assert not repo.email_taken("alex@example.com", exclude_id=1)
+        assert not repo.email_taken("nobody@example.com")
+
+        with pytest.raises(DuplicateEmailError):
+            repo.add({"name": "Копия", "email": "Maria@Example.com", "age": 30})
+        with pytest.raises(DuplicateEmailError):
+            repo.update(1, {"email": "maria@example.com"})
+
+        repo.update(1, {"email": "alex.new@example.com"})
+        assert not repo.email_taken("alex@example.com")
+        assert repo.email_taken("alex.new@example.com")
+
+    def test_ids_are_monotonic(self, users_path):
+        repo = UserRepository(CountingStorage(users_path))
+
+        first = repo.add({"name": "Первый", "email": "first@example.com", "age": 20})
+        assert first['id'] == 3
+
+        # id удаленного пользователя повторно не выдается
+        repo.delete(first['id'])
+        second = repo.add({"name": "Второй", "email": "second@example.com", "age": 20})
+        assert second['id'] == 4
+
+    def test_versions(self, users_path):
+        repo = UserRepository(CountingStorage(users_path))
+        version = repo.version
+        user_versions = repo.user_version(1), repo.user_version(2)
+
+        repo.update(1, {"city": "Тверь"})
+
+        assert repo.version != version
+        assert repo.user_version(1) != user_versions[0]
+        assert repo.user_version(2) == user_versions[1]
+        assert repo.user_version(99) is None
+        # Другой процесс с тем же файлом видит ту же версию
+        assert UserRepository(CountingStorage(users_path)).version == repo.version
+
+
+class TestUserQuery:
+
+    @pytest.fixture
+    def repo(self, tmp_path):
+        users = [
+            {"id": i, "name": name, "email": f"user{i}@example.com", "age": age, "city": city}
+            for i, (name, age, city) in enumerate([
+                ("Борис", 40, "Москва"),
+                ("анна", 25, "Казань"),
+                ("Виктор", 31, "москва"),
+                ("Галина", 25, ""),
+                ("Дмитрий", 52, "Казань"),
+            ], start=1)
+        ]
+        path = tmp_path / 'users.json'
+        path.write_text(json.dumps(users, ensure_ascii=False), encoding='utf-8')
+        return UserRepository(CountingStorage(str(path)))
+
+    def _ids(self, result):
+        users, total = result
+        return [u['id'] for u in users], total
+
+    def test_sort_and_paginate(self, repo):
+        assert self._ids(repo.query(sort='name', limit=2)) == ([2, 1], 5)
+        assert self._ids(repo.query(sort='name', limit=2, offset=2)) == ([3, 4], 5)
+        assert self._ids(repo.query(sort='age', descending=True, limit=3)) == ([5, 1, 3], 5)
+
+    def test_cursor_pagination(self, repo):
+        assert self._ids(repo.query(sort='age', limit=2, after_id=4)) == ([3, 1], 5)
+        assert self._ids(repo.query(sort='id', descending=True, limit=2, after_id=3)) == ([2, 1], 5)
+
+    def test_filters(self, repo):
+        assert self._ids(repo.query(city="МОСКВА")) == ([1, 3], 2)
+        assert self._ids(repo.query(min_age=25, max_age=31)) == ([2, 3, 4], 3)
+        assert self._ids(repo.query(city="Казань", min_age=30, sort='age')) == ([5], 1)
+
+    def test_orderings_follow_changes(self, repo):
+        repo.query(sort='age')
+        repo.update(5, {"age": 18})
+        repo.delete(1)
+        repo.add({"name": "Елена", "email": "elena@example.com", "age": 35, "city": "Москва"})
+
+        assert self._ids(repo.query(sort='age')) == ([5, 2, 4, 3, 6], 5)
+        assert self._ids(repo.query(city="москва")) == ([3, 6], 2)
+
+    def test_sort_keys_are_type_stable(self):
+        names = sorted(_sort_key(user, 'name') for user in [{"id": 1, "name": "Борис"}, {"id": 2, "name": 123},
+                                                              {"id": 3}])
+        assert [key[2] for key in names] == [2, 1, 3]
+        ages = sorted(_sort_key(user, 'age') for user in [{"id": 1, "age": 30}, {"id": 2, "age": "42"},
+                                                            {"id": 3, "age": 18}])
+        assert [key[2] for key in ages] == [3, 1, 2]
+
+    def test_filtered_orderings_follow_changes(self, repo):
+        assert self._ids(repo.query(city="Казань", sort='age')) == ([2, 5], 2)
+        repo.update(2, {"age": 60})
+        assert self._ids(repo.query(city="Казань", sort='age')) == ([5, 2], 2)
+        repo.delete(5)
+        assert self._ids(repo.query(city="Казань", sort='age')) == ([2], 1)
+
+    def test_failed_write_reloads_from_storage(self, repo, monkeypatch):
+        def broken(*args):
+            raise RuntimeError('index is broken')
+        repo.query(sort='name')
+        monkeypatch.setattr(repo, '_persist', broken)
+        with pytest.raises(RuntimeError):
+            repo.add({"name": "Фантом", "email": "phantom@example.com", "age": 20})
+        monkeypatch.undo()
+
+        assert repo.get(6) is None
+        assert not repo.email_taken("phantom@example.com")
+
+    def test_unknown_sort_field(self, repo):
+        with pytest.raises(ValueError):
+            repo.query(sort='email')
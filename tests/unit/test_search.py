@@ -0,0 +1,115 @@
+import pytest
+import os
+import sys
+
+# Добавляем путь к приложению
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.search import SearchIndex, tokenize
+
+
+@pytest.fixture
+def mock_users():
+    return [
+        {
+            "id": 1,
+            "name": "Александр Петров",
+            "email": "alex@example.com",
+            "age": 28,
+            "phone": "+7 (911) 111-11-11",
+            "city": "Москва"
+        },
+        {
+            "id": 2,
+            "name": "Мария Иванова",
+            "email": "maria@example.com",
+            "age": 32,
+            "phone": "+7 (922) 222-22-22",
+            "city": "Казань"
+        },
+        {
+            "id": 3,
+            "name": "Иван Сидоров",
+            "email": "ivan@example.com",
+            "age": 45,
+            "phone": "+7 (933) 333-33-33",
+            "city": "Новосибирск"
+        },
+        {
+            "id": 4,
+            "name": "Пётр Ёлкин",
+            "email": "petr@mail.ru",
+            "age": 50,
+            "phone": "89441234567",
+            "city": "Москва"
+        }
+    ]
+
+
+@pytest.fixture
+def index(mock_users):
+    index = SearchIndex()
+    for user in mock_users:
+        index.add(user)
+    return index
+
+
+class TestSearchIndex:
+
+    def test_tokenize_cyrillic(self):
+        assert tokenize("Пётр ЁЛКИН, Москва") == ["петр", "елкин", "москва"]
+
+    def test_prefix_search(self, index):
+        assert index.search("ива") == {2, 3}
+        assert index.search("иван") == {2, 3}
+        assert index.search("иван сид") == {3}
+        assert index.search("МОСК") == {1, 4}
+
+    def test_yo_is_e(self, index):
+        assert index.search("петр") == {1, 4}
+        assert index.search("петр елкин") == {4}
+        assert index.search("ёлк") == {4}
+
+    def test_email_and_phone(self, index):
+        assert index.search("maria@exa") == {2}
+        assert index.search("example.com") == {1, 2, 3}
+        assert index.search("9441234") == {4}
+        assert index.search("922") == {2}
+
+    def test_no_match(self, index):
+        assert index.search("ззз") == set()
+        assert index.search("  ") == set()
+
+    def test_incremental_updates(self, index, mock_users):
+        index.remove(mock_users[2])
+        assert index.search("иван") == {2}
+
+        renamed = dict(mock_users[1], name="Мария Смирнова")
+        index.remove(mock_users[1])
+        index.add(renamed)
+        assert index.search("иванова") == set()
+        assert index.search("смирн") == {2}
+
+    def test_removed_token_added_back(self, index, mock_users):
+        index.search("иван")
+        index.remove(mock_users[2])
+        index.add(mock_users[2])
+        assert index.search("сидор") == {3}
+        assert index._tokens == sorted(set(index._tokens))
+
+    def test_build_is_not_quadratic(self):
+        import time
+
+        def build(count):
+            index = SearchIndex()
+            started = time.perf_counter()
+            for i in range(count):
+                index.add({"id": i, "name": f"Имя{i} Фамилия{i}", "email": f"user{i}@example.com",
+                           "city": f"Город{i % 1000}", "phone": f"+7 (900) {i:07d}"})
+            assert index.search(f"имя{count - 1}") == {count - 1}
+            return time.perf_counter() - started
+
+        small, large = build(10000), build(60000)
+        # Линейное построение: в 6 раз больше пользователей - примерно в 6 раз дольше
+        assert large < 15
+        assert large < small * 15
@@ -0,0 +1,71 @@
+import pytest
+import os
+import sys
+
+# Добавляем путь к приложению
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src import stats
+from src.stats import UserStats, compute_stats
+
+
+@pytest.fixture
+def users():
+    return [
+        {"id": 1, "name": "Борис", "age": 40, "city": "Москва", "created_at": "2024-01-01 10:00:00"},
+        {"id": 2, "name": "Анна", "age": 25, "city": "Казань", "created_at": "2024-01-01 11:00:00"},
+        {"id": 3, "name": "Виктор", "age": 31, "city": "москва ", "created_at": "2024-01-02 09:00:00"},
+        {"id": 4, "name": "Галина", "age": 29, "city": ""},
+    ]
+
+
+class TestUserStats:
+
+    def test_snapshot(self, users):
+        user_stats = UserStats()
+        for user in users:
+            user_stats.add(user)
+
+        report = user_stats.snapshot()
+        assert report['total'] == 4
+        assert report['cities'] == [{"city": "Москва", "count": 2},
+                                    {"city": "", "count": 1},
+                                    {"city": "Казань", "count": 1}]
+        assert report['age']['min'] == 25
+        assert report['age']['max'] == 40
+        assert report['age']['mean'] == 31.25
+        assert report['age']['histogram'] == [{"from": 20, "to": 29, "count": 2},
+                                              {"from": 30, "to": 39, "count": 1},
+                                              {"from": 40, "to": 49, "count": 1}]
+        assert report['signups_per_day'] == [{"date": "2024-01-01", "count": 2},
+                                             {"date": "2024-01-02", "count": 1}]
+
+    def test_remove(self, users):
+        user_stats = UserStats()
+        for user in users:
+            user_stats.add(user)
+        user_stats.remove(users[1])
+        user_stats.remove(users[3])
+
+        report = user_stats.snapshot(age_bucket=5)
+        assert report['total'] == 2
+        assert report['cities'] == [{"city": "Москва", "count": 2}]
+        assert report['age']['histogram'] == [{"from": 30, "to": 34, "count": 1},
+                                              {"from": 40, "to": 44, "count": 1}]
+        assert report['signups_per_day'] == [{"date": "2024-01-01", "count": 1},
+                                             {"date": "2024-01-02", "count": 1}]
+
+    def test_recompute_matches_incremental(self, users, monkeypatch):
+        user_stats = UserStats()
+        for user in users:
+            user_stats.add(user)
+
+        monkeypatch.setattr(stats, 'numpy', None)
+        assert compute_stats(users) == user_stats.snapshot()
+
+    def test_numpy_recompute(self, users):
+        pytest.importorskip('numpy')
+        user_stats = UserStats()
+        for user in users:
+            user_stats.add(user)
+        assert compute_stats(users) == user_stats.snapshot()
@@ -0,0 +1,203 @@
+import pytest
+import json
+import os
+import sys
+
+# Добавляем путь к приложению
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.repository import UserRepository
+from src.storage import JournalStorage
+
+
+@pytest.fixture
+def mock_users():
+    return [
+        {
+            "id": 1,
+            "name": "Александр Петров",
+            "email": "alex@example.com",
+            "age": 28,
+            "phone": "+7 (911) 111-11-11",
+            "city": "Москва"
+        },
+        {
+            "id": 2,
+            "name": "Мария Иванова",
+            "email": "maria@example.com",
+            "age": 32,
+            "phone": "+7 (922) 222-22-22",
+            "city": "Казань"
+        }
+    ]
+
+
+@pytest.fixture
+def users_path(tmp_path, mock_users):
+    path = tmp_path / 'users.json'
+    path.write_text(json.dumps(mock_users, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+class TestJournalStorage:
+
+    def test_changes_are_appended_to_log(self, users_path, mock_users):
+        repo = UserRepository(JournalStorage(users_path))
+
+        repo.add({"name": "Новый", "email": "new@example.com", "age": 20})
+        repo.update(1, {"city": "Тверь"})
+        repo.delete(2)
+
+        # Снимок не переписывался
+        with open(users_path, 'r', encoding='utf-8') as f:
+            assert json.load(f) == mock_users
+
+        with open(users_path + '.log', 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        assert [r['op'] for r in records] == ['create', 'update', 'delete']
+        assert records[2] == {"op": "delete", "id": 2}
+
+    def test_startup_replays_snapshot_and_log(self, users_path):
+        repo = UserRepository(JournalStorage(users_path))
+        repo.add({"name": "Новый", "email": "new@example.com", "age": 20})
+        repo.update(1, {"city": "Тверь"})
+        repo.delete(2)
+
+        restarted = UserRepository(JournalStorage(users_path))
+        assert [u['id'] for u in restarted.all()] == [1, 3]
+        assert restarted.get(1)['city'] == "Тверь"
+
+    def test_torn_last_line_is_ignored(self, users_path):
+        repo = UserRepository(JournalStorage(users_path))
+        repo.add({"name": "Новый", "email": "new@example.com", "age": 20})
+
+        with open(users_path + '.log', 'a', encoding='utf-8') as f:
+            f.write('{"op": "create", "user": {"id": 4')
+
+        restarted = UserRepository(JournalStorage(users_path))
+        assert [u['id'] for u in restarted.all()] == [1, 2, 3]
+
+    def test_append_after_torn_line_survives_restart(self, users_path):
+        repo = UserRepository(JournalStorage(users_path))
+        repo.add({"name": "Новый", "email": "new@example.com", "age": 20})
+        with open(users_path + '.log', 'ab') as f:
+            f.write(b'{"op": "create", "user": {"id": 4')
+
+        restarted = UserRepository(JournalStorage(users_path))
+        user = restarted.add({"name": "После сбоя", "email": "after@example.com", "age": 30})
+        assert user['id'] == 4
+
+        again = UserRepository(JournalStorage(users_path))
+        assert [u['id'] for u in again.all()] == [1, 2, 3, 4]
+        assert again.add({"name": "Еще", "email": "more@example.com", "age": 30})['id'] == 5
+
+    def test_other_process_changes_are_tailed(self, users_path, monkeypatch):
+        repo = UserRepository(JournalStorage(users_path))
+        other = UserRepository(JournalStorage(users_path))
+        other.add({"name": "Новый", "email": "new@example.com", "age": 20})
+        other.update(1, {"city": "Тверь"})
+        other.delete(2)
+
+        # Дочитывается только хвост журнала, без полной перезагрузки
+        monkeypatch.setattr(repo, '_build_indexes', lambda users: pytest.fail('full reload'))
+        assert sorted(u['id'] for u in repo.all()) == [1, 3]
+        assert repo.get(1)['city'] == "Тверь"
+
+    def test_compaction_folds_log_into_snapshot(self, users_path):
+        repo = UserRepository(JournalStorage(users_path, compact_every=3))
+        for i in range(3):
+            repo.add({"name": f"Пользователь {i}", "email": f"user{i}@example.com", "age": 20})
+
+        assert os.path.getsize(users_path + '.log') == 0
+        with open(users_path, 'r', encoding='utf-8') as f:
+            assert [u['id'] for u in json.load(f)] == [1, 2, 3, 4, 5]
+
+
+class TestConcurrentWrites:
+
+    def test_parallel_writers_do_not_lose_updates(self, users_path):
+        import threading
+        from src.storage import JsonFileStorage, write_json_atomic
+
+        def read():
+            with open(users_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        def write(users):
+            write_json_atomic(users_path, users)
+
+        # Отдельный репозиторий и файловая блокировка на каждый "воркер"
+        def worker(n):
+            repo = UserRepository(JsonFileStorage(users_path, load=read, save=write))
+            for i in range(10):
+                repo.add({"name": f"Воркер {n}", "email": f"w{n}-{i}@example.com", "age": 20})
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        users = read()
+        assert len(users) == 2 + 4 * 10
+        assert len({u['id'] for u in users}) == len(users)
+
+
+class TestSqliteStorage:
+
+    @pytest.fixture
+    def db_path(self, tmp_path, users_path):
+        from src.storage import migrate_json_to_sqlite
+
+        path = str(tmp_path / 'users.db')
+        assert migrate_json_to_sqlite(users_path, path) == 2
+        return path
+
+    def test_migration_keeps_users(self, db_path, mock_users):
+        from src.storage import SqliteStorage
+
+        repo = UserRepository(SqliteStorage(db_path))
+        assert repo.all() == mock_users
+
+    def test_point_writes(self, db_path):
+        from src.storage import SqliteStorage
+
+        repo = UserRepository(SqliteStorage(db_path))
+        repo.add({"name": "Новый", "email": "new@example.com", "age": 20})
+        repo.update(1, {"city": "Тверь"})
+        repo.delete(2)
+
+        restarted = UserRepository(SqliteStorage(db_path))
+        assert [u['id'] for u in restarted.all()] == [1, 3]
+        assert restarted.get(1)['city'] == "Тверь"
+
+    def test_new_connection_after_fork(self, db_path, monkeypatch):
+        from src.storage import SqliteStorage
+
+        storage = SqliteStorage(db_path)
+        parent_conn = storage._connection()
+        monkeypatch.setattr(os, 'getpid', lambda: -1)
+        assert storage._connection() is not parent_conn
+        assert len(storage.load()) == 2
+
+    def test_unique_email_index(self, db_path):
+        from src.repository import DuplicateEmailError
+        from src.storage import SqliteStorage
+
+        storage = SqliteStorage(db_path)
+        with pytest.raises(DuplicateEmailError):
+            storage.commit([('create', {"id": 10, "name": "Копия", "email": "ALEX@example.com"})], list)
+
+    def test_other_process_changes_are_synced_incrementally(self, db_path):
+        from src.storage import SqliteStorage
+
+        repo = UserRepository(SqliteStorage(db_path))
+        other = UserRepository(SqliteStorage(db_path))
+
+        other.add({"name": "Новый", "email": "new@example.com", "age": 20})
+        other.delete(1)
+
+        repo.storage.load = None  # полная перезагрузка не должна понадобиться
+        assert [u['id'] for u in repo.all()] == [2, 3]
+        assert repo.email_taken("new@example.com")
+        assert not repo.email_taken("alex@example.com")
@@ -0,0 +1,44 @@
+import pytest
+import json
+import os
+import sys
+
+# Добавляем путь к приложению
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.streaming import iter_json_array, iter_ndjson
+
+
+class TestStreaming:
+
+    @pytest.mark.parametrize('count', [0, 1, 2, 5, 6])
+    def test_json_array_in_chunks(self, count):
+        items = [{"id": i, "name": f"Пользователь {i}"} for i in range(count)]
+
+        chunks = list(iter_json_array(items, chunk_size=2))
+        assert json.loads(''.join(chunks)) == items
+        # Открывающая и закрывающая скобки + по куску на каждые 2 элемента
+        assert len(chunks) == 2 + (count + 1) // 2
+
+        pretty = ''.join(iter_json_array(items, chunk_size=2, indent=2))
+        assert json.loads(pretty) == items
+
+    def test_ndjson(self):
+        items = [{"id": i} for i in range(5)]
+
+        chunks = list(iter_ndjson(items, chunk_size=2))
+        assert len(chunks) == 3
+        assert [json.loads(line) for line in ''.join(chunks).splitlines()] == items
+
+    def test_consumes_items_lazily(self):
+        consumed = []
+
+        def items():
+            for i in range(10):
+                consumed.append(i)
+                yield {"id": i}
+
+        stream = iter_json_array(items(), chunk_size=3)
+        next(stream)
+        next(stream)
+        assert consumed == [0, 1, 2]
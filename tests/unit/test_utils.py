@@ -41,25 +41,40 @@ def mock_users():
     ]
 
 
+@pytest.fixture
+def users_file(tmp_path, monkeypatch):
+    # save_users подменяет файл через rename, поэтому пишем во временный каталог
+    path = tmp_path / 'users.json'
+    monkeypatch.setattr('app.USERS_FILE', str(path))
+    return path
+
+
 class TestFileOperations:
 
-    def test_save_users_success(self, mock_users):
+    def test_save_users_success(self, mock_users, users_file):
         mock_file = mock_open()
 
         with patch('builtins.open', mock_file):
-            with patch('json.dump') as mock_json_dump:
+            with patch('src.jsoncodec.dumpb', return_value=b'[]') as mock_dumpb:
                 save_users(mock_users)
 
                 mock_file.assert_called_once()
 
-                # вызван с правильными аргументами
-                mock_json_dump.assert_called_once()
-                args, kwargs = mock_json_dump.call_args
+                # вызван с правильными аргументами: хранилище пишется компактно
+                mock_dumpb.assert_called_once()
+                args, kwargs = mock_dumpb.call_args
                 assert args[0] == mock_users
-                assert kwargs['ensure_ascii'] == False
-                assert kwargs['indent'] == 2
+                assert kwargs.get('indent') is None
+
+    def test_save_users_compact_utf8(self, mock_users, users_file):
+        save_users(mock_users)
+
+        content = users_file.read_bytes()
+        assert b'\n' not in content
+        assert 'Александр Петров'.encode('utf-8') in content
+        assert json.loads(content) == mock_users
 
-    def test_save_users_io_error(self, mock_users):
+    def test_save_users_io_error(self, mock_users, users_file):
         mock_file = mock_open()
         mock_file.side_effect = IOError("Disk full")
 
@@ -67,6 +82,17 @@ class TestFileOperations:
             with pytest.raises(IOError):
                 save_users(mock_users)
 
+    def test_save_users_failure_keeps_old_file(self, mock_users, users_file):
+        save_users(mock_users)
+
+        with patch('src.jsoncodec.dumpb', side_effect=IOError("Disk full")):
+            with pytest.raises(IOError):
+                save_users(mock_users[:1])
+
+        # Старая версия файла цела, временные файлы убраны
+        assert load_users() == mock_users
+        assert os.listdir(users_file.parent) == ['users.json']
+
 
 class TestDataProcessing:
 
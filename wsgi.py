@@ -0,0 +1,6 @@
+# WSGI точка входа для production сервера:
+#   gunicorn wsgi:application            (настройки берутся из gunicorn.conf.py)
+# Встроенный сервер Flask (python app.py) - только для разработки
+from app import app
+
+application = app